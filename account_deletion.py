@@ -0,0 +1,94 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, or_
+from models import db, User, Experience, Video, Follow, AccountDeletionJob
+from follow_cache import follow_cache
+from follow_graph import follow_graph
+
+def delete_in_chunks(model, condition, chunk_size, pause=0):
+    """Remover linhas em blocos, cada um em sua própria transação (sem locks longos)"""
+    total = 0
+    while True:
+        ids = select(model.id).where(condition).limit(chunk_size)
+        result = db.session.execute(
+            delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total += result.rowcount
+
+        if result.rowcount < chunk_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+def run_account_deletion(job_id):
+    """Executar o job: follows, vídeos, experiências e por fim o usuário"""
+    chunk_size = current_app.config['ACCOUNT_DELETE_CHUNK_SIZE']
+    pause = current_app.config['ACCOUNT_DELETE_PAUSE']
+
+    job = db.session.get(AccountDeletionJob, job_id)
+    user_id = job.user_id
+
+    steps = [
+        ('follows', Follow, or_(Follow.follower_id == user_id, Follow.following_id == user_id)),
+        ('videos', Video, Video.creator_id == user_id),
+        ('experiences', Experience, Experience.creator_id == user_id),
+        ('users', User, User.id == user_id),
+    ]
+
+    try:
+        job.status = 'running'
+        job.deleted = {}
+        db.session.commit()
+
+        for name, model, condition in steps:
+            total = delete_in_chunks(model, condition, chunk_size, pause)
+
+            job = db.session.get(AccountDeletionJob, job_id)
+            job.deleted = dict(job.deleted or {}, **{name: total})
+            db.session.commit()
+
+        job.status = 'done'
+        db.session.commit()
+
+        follow_graph.remove_user(user_id)
+        follow_cache.clear()
+
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(AccountDeletionJob, job_id)
+        job.status = 'failed'
+        job.error = str(e)
+        db.session.commit()
+
+def start_account_deletion(user_id):
+    """Criar (ou reaproveitar) o job de exclusão da conta e iniciá-lo"""
+    stale_after = timedelta(seconds=current_app.config['ACCOUNT_DELETE_STALE_AFTER'])
+
+    job = AccountDeletionJob.query.filter_by(user_id=user_id).order_by(
+        AccountDeletionJob.created_at.desc()
+    ).first()
+
+    # Job em andamento recente: não iniciar outro
+    if job and job.status in ('pending', 'running') and job.updated_at > datetime.utcnow() - stale_after:
+        return job
+
+    job = AccountDeletionJob(user_id=user_id)
+    db.session.add(job)
+    db.session.commit()
+
+    if not current_app.config['ACCOUNT_DELETE_ASYNC']:
+        run_account_deletion(job.id)
+        return db.session.get(AccountDeletionJob, job.id)
+
+    app = current_app._get_current_object()
+    job_id = job.id
+
+    def run():
+        with app.app_context():
+            run_account_deletion(job_id)
+
+    threading.Thread(target=run, daemon=True).start()
+    return job
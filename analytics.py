@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+import click
+from datetime import datetime, date, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, func, text, and_
+from models import db, Experience, Video, Follow, CreatorDailyStats, dialect_insert
+
+# Chave do advisory lock do PostgreSQL (um rollup por vez entre workers e cron)
+ANALYTICS_LOCK_ID = 7_412_002
+
+EVENT_COLUMNS = ('new_followers', 'experiences_created', 'videos_created')
+SNAPSHOT_COLUMNS = ('views', 'views_total', 'engagement', 'engagement_total', 'followers_total')
+
+def _as_date(value):
+    # func.date() devolve date no PostgreSQL e 'AAAA-MM-DD' no SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def _upsert(rows, columns, batch_size):
+    """INSERT ... ON CONFLICT (creator_id, day) DO UPDATE das colunas informadas (executemany)"""
+    stmt = dialect_insert(CreatorDailyStats.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['creator_id', 'day'],
+        set_={name: stmt.excluded[name] for name in columns + ('updated_at',)}
+    )
+    conn = db.session.connection()
+    for i in range(0, len(rows), batch_size):
+        conn.execute(stmt, rows[i:i + batch_size])
+
+def rollup_creator_stats(today=None, batch_size=1000):
+    """Atualizar creator_daily_stats de forma incremental
+
+    Contagens por dia (novos seguidores, experiências e vídeos criados) são
+    recalculadas a partir do último dia já agregado, usando os created_at
+    (zeradas antes, para dias cujos eventos foram removidos).
+    Views, engagement e seguidores não têm histórico: o rollup guarda o total
+    atual na linha de hoje e o ganho desde o último total registrado (só para
+    criadores cujo total mudou, incluindo os que ficaram sem vídeos, experiências
+    ou seguidores). Os totais são lidos da tabela inteira porque unfollows e
+    exclusões não deixam registro para uma leitura por created_at/updated_at.
+    Retorna o resumo da execução ou None se outro rollup estiver em andamento.
+    """
+    today = today or datetime.utcnow().date()
+    now = datetime.utcnow()
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        locked = db.session.execute(text('SELECT pg_try_advisory_xact_lock(:id)'), {'id': ANALYTICS_LOCK_ID}).scalar()
+        if not locked:
+            db.session.rollback()
+            return None
+
+    # Recalcular a partir do último dia agregado (ele pode ter sido parcial)
+    last_day = db.session.scalar(select(func.max(CreatorDailyStats.day)))
+    first_run = last_day is None
+    if first_run:
+        earliest = [
+            db.session.scalar(select(func.min(column)))
+            for column in (Follow.created_at, Experience.created_at, Video.created_at)
+        ]
+        earliest = [value for value in earliest if value is not None]
+        start = min(earliest).date() if earliest else today
+    else:
+        start = min(_as_date(last_day), today)
+    since = datetime.combine(start, datetime.min.time())
+    until = datetime.combine(today + timedelta(days=1), datetime.min.time())
+
+    events = {}
+    for column, creator_column, created_at in (
+        ('new_followers', Follow.following_id, Follow.created_at),
+        ('experiences_created', Experience.creator_id, Experience.created_at),
+        ('videos_created', Video.creator_id, Video.created_at),
+    ):
+        day = func.date(created_at)
+        stmt = select(creator_column, day, func.count()).where(
+            created_at >= since, created_at < until
+        ).group_by(creator_column, day)
+        for creator_id, event_day, count in db.session.execute(stmt):
+            row = events.setdefault((creator_id, _as_date(event_day)), dict.fromkeys(EVENT_COLUMNS, 0))
+            row[column] = count
+
+    # Dias recalculados que perderam todos os eventos (ex.: unfollow, exclusão)
+    # não aparecem na consulta acima: zerar antes do upsert
+    db.session.execute(
+        update(CreatorDailyStats)
+        .where(CreatorDailyStats.day >= start, CreatorDailyStats.day <= today)
+        .values(dict(dict.fromkeys(EVENT_COLUMNS, 0), updated_at=now))
+    )
+
+    event_rows = [
+        dict(counts, creator_id=creator_id, day=event_day, updated_at=now)
+        for (creator_id, event_day), counts in events.items()
+    ]
+    _upsert(event_rows, EVENT_COLUMNS, batch_size)
+
+    # Totais atuais por criador
+    totals = {}
+    for column, stmt in (
+        ('views_total', select(Video.creator_id, func.sum(Video.views)).group_by(Video.creator_id)),
+        ('engagement_total', select(Experience.creator_id, func.sum(Experience.engagement)).group_by(Experience.creator_id)),
+        ('followers_total', select(Follow.following_id, func.count()).group_by(Follow.following_id)),
+    ):
+        for creator_id, value in db.session.execute(stmt):
+            totals.setdefault(creator_id, dict.fromkeys(('views_total', 'engagement_total', 'followers_total'), 0))
+            totals[creator_id][column] = int(value or 0)
+
+    # Último total registrado antes de hoje, por criador
+    latest = select(
+        CreatorDailyStats.creator_id, func.max(CreatorDailyStats.day).label('day')
+    ).where(
+        CreatorDailyStats.day < today, CreatorDailyStats.views_total.is_not(None)
+    ).group_by(CreatorDailyStats.creator_id).subquery()
+    previous = {
+        row.creator_id: row
+        for row in db.session.execute(
+            select(CreatorDailyStats.creator_id, CreatorDailyStats.views_total,
+                   CreatorDailyStats.engagement_total, CreatorDailyStats.followers_total)
+            .join(latest, and_(CreatorDailyStats.creator_id == latest.c.creator_id, CreatorDailyStats.day == latest.c.day))
+        )
+    }
+
+    # Criadores que já têm total registrado hoje (rollup anterior no mesmo dia)
+    recorded_today = set(db.session.scalars(
+        select(CreatorDailyStats.creator_id).where(
+            CreatorDailyStats.day == today, CreatorDailyStats.views_total.is_not(None)
+        )
+    ))
+
+    # Quem perdeu o último vídeo/experiência/seguidor some dos GROUP BY: total 0
+    zero = dict.fromkeys(('views_total', 'engagement_total', 'followers_total'), 0)
+    snapshot_rows = []
+    for creator_id in totals.keys() | previous.keys() | recorded_today:
+        current = totals.get(creator_id, zero)
+        prev = previous.get(creator_id)
+        if prev is not None and (prev.views_total, prev.engagement_total, prev.followers_total) == (
+            current['views_total'], current['engagement_total'], current['followers_total']
+        ):
+            continue  # nada mudou: a leitura repete o último total
+
+        # Na primeira execução não há total anterior: o ganho do dia fica em 0
+        base_views = prev.views_total if prev is not None else (None if first_run else 0)
+        base_engagement = prev.engagement_total if prev is not None else (None if first_run else 0)
+        snapshot_rows.append(dict(
+            dict.fromkeys(EVENT_COLUMNS, 0),
+            creator_id=creator_id,
+            day=today,
+            views=max(0, current['views_total'] - base_views) if base_views is not None else 0,
+            engagement=max(0, current['engagement_total'] - base_engagement) if base_engagement is not None else 0,
+            updated_at=now,
+            **current
+        ))
+    _upsert(snapshot_rows, SNAPSHOT_COLUMNS, batch_size)
+
+    db.session.commit()
+    return {
+        'from': start.isoformat(),
+        'to': today.isoformat(),
+        'event_rows': len(event_rows),
+        'snapshot_rows': len(snapshot_rows),
+    }
+
+def creator_analytics(creator_id, days, today=None):
+    """Série diária e totais do criador lidos apenas de creator_daily_stats"""
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+
+    rows = {
+        row.day: row
+        for row in db.session.execute(
+            select(CreatorDailyStats).where(
+                CreatorDailyStats.creator_id == creator_id,
+                CreatorDailyStats.day >= start,
+                CreatorDailyStats.day <= today
+            )
+        ).scalars()
+    }
+
+    # Totais do último rollup antes do período (repetidos até a próxima mudança)
+    baseline = db.session.execute(
+        select(CreatorDailyStats.views_total, CreatorDailyStats.engagement_total, CreatorDailyStats.followers_total)
+        .where(CreatorDailyStats.creator_id == creator_id, CreatorDailyStats.day < start,
+               CreatorDailyStats.views_total.is_not(None))
+        .order_by(CreatorDailyStats.day.desc()).limit(1)
+    ).first()
+    views_total, engagement_total, followers_total = baseline or (None, None, None)
+
+    daily = []
+    summary = dict.fromkeys(('views', 'engagement', 'new_followers', 'experiences_created', 'videos_created'), 0)
+    updated_at = None
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day)
+        if row is not None:
+            if row.views_total is not None:
+                views_total, engagement_total, followers_total = row.views_total, row.engagement_total, row.followers_total
+            updated_at = max(updated_at, row.updated_at) if updated_at else row.updated_at
+
+        entry = {
+            'date': day.isoformat(),
+            'views': row.views if row else 0,
+            'engagement': row.engagement if row else 0,
+            'new_followers': row.new_followers if row else 0,
+            'experiences_created': row.experiences_created if row else 0,
+            'videos_created': row.videos_created if row else 0,
+            'views_total': views_total,
+            'engagement_total': engagement_total,
+            'followers_total': followers_total,
+        }
+        for name in summary:
+            summary[name] += entry[name]
+        daily.append(entry)
+
+    return {
+        'creator_id': creator_id,
+        'from': start.isoformat(),
+        'to': today.isoformat(),
+        'totals': dict(summary, views_total=views_total, engagement_total=engagement_total, followers_total=followers_total),
+        'daily': daily,
+        'updated_at': updated_at.isoformat() if updated_at else None
+    }
+
+class AnalyticsScheduler:
+    """Executa o rollup a cada ANALYTICS_ROLLUP_INTERVAL segundos em uma thread
+
+    A thread é iniciada na primeira requisição de cada processo (com
+    preload_app o mestre não atende requisições). No PostgreSQL um advisory
+    lock garante um rollup por vez entre workers. Com intervalo 0 o rollup
+    fica a cargo de `flask analytics-rollup` (cron).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('ANALYTICS_ROLLUP_INTERVAL', 0)
+        self.batch_size = app.config.get('ANALYTICS_BATCH_SIZE', 1000)
+
+        if self.interval > 0:
+            app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    rollup_creator_stats(batch_size=self.batch_size)
+            except Exception as e:
+                self.app.logger.warning(f'Falha no rollup de analytics: {e}')
+            time.sleep(self.interval)
+
+analytics_scheduler = AnalyticsScheduler()
+
+@click.command('analytics-rollup')
+@click.option('--date', 'day', default=None, help='Dia de referência (AAAA-MM-DD, padrão: hoje em UTC)')
+@with_appcontext
+def analytics_rollup_command(day):
+    """Atualizar os agregados diários de analytics dos criadores"""
+    today = date.fromisoformat(day) if day else None
+    result = rollup_creator_stats(today, current_app.config['ANALYTICS_BATCH_SIZE'])
+    if result is None:
+        click.echo('Outro rollup está em andamento.')
+        return
+    click.echo(
+        f"Rollup de {result['from']} a {result['to']}: "
+        f"{result['event_rows']} linhas de eventos, {result['snapshot_rows']} totais atualizados"
+    )
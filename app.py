@@ -1,11 +1,23 @@
 from flask import Flask, jsonify
+from sqlalchemy.orm import configure_mappers
+from datetime import datetime
 from flask_cors import CORS
 from config import config
-from models import db
+from models import db, GUID
+from follow_cache import follow_cache
+from follow_graph import follow_graph
+from idempotency import idempotency_store
+from analytics import analytics_scheduler
+from rate_limit import rate_limiter, load_shedder
+from readiness import readiness
+from tracing import tracer
+from compression import compressor, cache_policy
 from routes_users import users_bp
 from routes_experiences import experiences_bp
 from routes_videos import videos_bp
 from routes_follows import follows_bp
+from commands import register_commands
+from migrations import upgrade
 import os
 
 def create_app(config_name='development'):
@@ -18,8 +30,29 @@ def create_app(config_name='development'):
     app.config.from_object(config[config_name])
     
     # Inicializar banco de dados
+    GUID.native = app.config['DB_NATIVE_UUID']
     db.init_app(app)
     
+    # Inicializar cache de follows
+    follow_cache.init_app(app)
+    
+    # Respostas guardadas por Idempotency-Key
+    idempotency_store.init_app(app)
+    
+    # Tracing das requisições (primeiro, para o span raiz cobrir os demais hooks)
+    tracer.init_app(app)
+    
+    # Prontidão (/ready) e contagem de requisições em andamento
+    readiness.init_app(app)
+    
+    # Load shedding e rate limiting (antes das rotas)
+    load_shedder.init_app(app)
+    rate_limiter.init_app(app)
+    
+    # Cache-Control por rota e compressão das respostas
+    cache_policy.init_app(app)
+    compressor.init_app(app)
+    
     # Configurar CORS
     CORS(app, origins=app.config['CORS_ORIGIN'])
     
@@ -29,14 +62,26 @@ def create_app(config_name='development'):
     app.register_blueprint(videos_bp)
     app.register_blueprint(follows_bp)
     
+    # Registrar comandos do CLI
+    register_commands(app)
+    
     # Health check
     @app.route('/health', methods=['GET'])
     def health():
         return jsonify({
             'status': 'ok',
-            'timestamp': __import__('datetime').datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow().isoformat()
         }), 200
     
+    # Readiness check (banco, pool, réplicas, drenagem) para o load balancer
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        body, status_code = readiness.check()
+        response = jsonify(body)
+        response.status_code = status_code
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
     # 404 handler
     @app.errorhandler(404)
     def not_found(error):
@@ -48,9 +93,21 @@ def create_app(config_name='development'):
         db.session.rollback()
         return jsonify({'error': 'Erro interno do servidor'}), 500
     
-    # Criar tabelas
-    with app.app_context():
-        db.create_all()
+    # Migrações ficam a cargo de `flask db upgrade`; só rodam na inicialização
+    # quando AUTO_MIGRATE está ativo (desenvolvimento e testes)
+    if app.config['AUTO_MIGRATE']:
+        with app.app_context():
+            upgrade()
+    
+    # Configurar os mappers agora, e não na primeira requisição de cada worker
+    # (com --preload o estado aquecido é compartilhado via copy-on-write)
+    configure_mappers()
+    
+    # Carregar índice do grafo de follows
+    follow_graph.init_app(app)
+    
+    # Rollup periódico de analytics (ANALYTICS_ROLLUP_INTERVAL > 0)
+    analytics_scheduler.init_app(app)
     
     return app
 
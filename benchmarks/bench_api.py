@@ -0,0 +1,405 @@
+"""Benchmark de carga dos blueprints (users, experiences, videos, follows)
+
+Popula um banco local (SQLite por padrão ou PostgreSQL via --database-url),
+executa um mix realista de requisições pelo test client do Flask ou por um
+servidor HTTP real e grava um JSON com throughput, latência p50/p95/p99 e
+comandos SQL por requisição, por cenário e no total.
+
+Uso:
+    python benchmarks/bench_api.py --users 2000 --requests 5000
+    python benchmarks/bench_api.py --mode http --concurrency 8 --output atual.json
+    python benchmarks/bench_api.py --compare base.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ['music', 'sports', 'gaming', 'education', 'travel', 'food', 'art', 'tech']
+PASSWORD = 'bench-password'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help='Padrão: SQLite em arquivo temporário')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--avg-following', type=float, default=20, help='Média de follows por usuário')
+    parser.add_argument('--experiences', type=int, default=3000)
+    parser.add_argument('--videos', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--mode', choices=['client', 'http'], default='client')
+    parser.add_argument('--concurrency', type=int, default=4, help='Threads no modo http')
+    parser.add_argument('--only', default=None, help='Blueprints separados por vírgula (users,experiences,videos,follows)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Arquivo JSON de saída (padrão: stdout)')
+    parser.add_argument('--compare', default=None, help='JSON de uma execução anterior para comparar p95')
+    return parser.parse_args()
+
+def create_bench_app(database_url):
+    """Criar a aplicação em modo produção apontando para o banco do benchmark"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['AUTO_MIGRATE'] = 'true'
+    # Todas as requisições saem do mesmo IP: o rate limit distorceria a medição
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+    from app import create_app
+    from models import db
+    from sqlalchemy import event
+    from flask import g, has_app_context
+
+    app = create_app('production')
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        if has_app_context():
+            g.bench_sql_count = g.get('bench_sql_count', 0) + 1
+
+    @app.after_request
+    def sql_count_header(response):
+        response.headers['X-Bench-SQL-Count'] = str(g.get('bench_sql_count', 0))
+        return response
+
+    return app
+
+def seed(app, args):
+    """Popular o banco com o gerador de dados sintéticos (sem HTTP nem bcrypt por usuário)"""
+    from seed import SyntheticData, load_synthetic
+    from follow_graph import follow_graph
+
+    data = SyntheticData(
+        users=args.users,
+        experiences=args.experiences,
+        videos=args.videos,
+        avg_following=args.avg_following,
+        seed=args.seed,
+        password=PASSWORD
+    )
+
+    with app.app_context():
+        counts = load_synthetic(data)
+
+        # Recarregar o índice de follows com os dados populados
+        if follow_graph.enabled:
+            follow_graph.load()
+
+    return {
+        'counts': counts,
+        'user_ids': [data.user_id(i) for i in range(args.users)],
+        'experience_ids': [data.experience_id(i) for i in range(args.experiences)],
+        'video_ids': [data.video_id(i) for i in range(args.videos)],
+    }
+
+def build_scenarios(app, data, rng):
+    """Mix de requisições: (blueprint, nome, peso, gerador de requisição)"""
+    from utils import generate_tokens
+
+    with app.app_context():
+        tokens = {}
+        for user_id in rng.sample(data['user_ids'], min(200, len(data['user_ids']))):
+            access_token, _ = generate_tokens(f'bench-{user_id}', user_id)
+            tokens[user_id] = {'Authorization': f'Bearer {access_token}'}
+
+    authed = list(tokens)
+    users, experiences, videos = data['user_ids'], data['experience_ids'], data['video_ids']
+
+    def auth():
+        user_id = rng.choice(authed)
+        return user_id, tokens[user_id]
+
+    def get_user():
+        return 'GET', f'/api/users/{rng.choice(users)}', None, {}
+
+    def get_me():
+        _, headers = auth()
+        return 'GET', '/api/users/me', None, headers
+
+    def login():
+        i = rng.randrange(len(users))
+        return 'POST', '/api/users/login', {'emailOrPhone': f'seed{i}', 'password': PASSWORD}, {}
+
+    def list_experiences():
+        params = f'?skip={rng.randint(0, 5) * 20}&take=20'
+        if rng.random() < 0.5:
+            params += f'&category={rng.choice(CATEGORIES)}'
+        return 'GET', f'/api/experiences{params}', None, {}
+
+    def get_experience():
+        return 'GET', f'/api/experiences/{rng.choice(experiences)}', None, {}
+
+    def experiences_by_creator():
+        return 'GET', f'/api/experiences/creator/{rng.choice(users)}', None, {}
+
+    def create_experience():
+        _, headers = auth()
+        body = {'title': 'Bench', 'category': rng.choice(CATEGORIES), 'duration': 600}
+        return 'POST', '/api/experiences', body, headers
+
+    def get_video():
+        return 'GET', f'/api/videos/{rng.choice(videos)}', None, {}
+
+    def videos_by_creator():
+        return 'GET', f'/api/videos/creator/{rng.choice(users)}', None, {}
+
+    def video_views():
+        return 'PATCH', f'/api/videos/{rng.choice(videos)}/views', None, {}
+
+    def create_video():
+        _, headers = auth()
+        body = {'title': 'Bench', 'url': 'https://cdn.example.com/new.mp4', 'duration': 30}
+        return 'POST', '/api/videos', body, headers
+
+    def followers():
+        return 'GET', f'/api/follows/{rng.choice(users)}/followers', None, {}
+
+    def following():
+        return 'GET', f'/api/follows/{rng.choice(users)}/following', None, {}
+
+    def is_following():
+        return 'GET', f'/api/follows/{rng.choice(users)}/is-following/{rng.choice(users)}', None, {}
+
+    def is_following_batch():
+        body = {'followerId': rng.choice(users), 'followingIds': rng.sample(users, min(50, len(users)))}
+        return 'POST', '/api/follows/is-following/batch', body, {}
+
+    def follow():
+        user_id, headers = auth()
+        return 'POST', '/api/follows', {'followerId': user_id, 'followingId': rng.choice(users)}, headers
+
+    def unfollow():
+        user_id, headers = auth()
+        return 'DELETE', f'/api/follows/{user_id}/{rng.choice(users)}', None, headers
+
+    def suggestions():
+        return 'GET', f'/api/follows/{rng.choice(users)}/suggestions', None, {}
+
+    return [
+        ('users', 'get_user', 10, get_user),
+        ('users', 'get_me', 6, get_me),
+        ('users', 'login', 1, login),
+        ('experiences', 'get_experiences', 14, list_experiences),
+        ('experiences', 'get_experience', 10, get_experience),
+        ('experiences', 'get_experiences_by_creator', 6, experiences_by_creator),
+        ('experiences', 'create_experience', 1, create_experience),
+        ('videos', 'get_video', 8, get_video),
+        ('videos', 'get_videos_by_creator', 6, videos_by_creator),
+        ('videos', 'update_video_views', 8, video_views),
+        ('videos', 'create_video', 1, create_video),
+        ('follows', 'get_followers', 6, followers),
+        ('follows', 'get_following', 4, following),
+        ('follows', 'is_following', 6, is_following),
+        ('follows', 'is_following_batch', 3, is_following_batch),
+        ('follows', 'follow_user', 2, follow),
+        ('follows', 'unfollow_user', 1, unfollow),
+        ('follows', 'get_suggestions', 2, suggestions),
+    ]
+
+class ClientDriver:
+    """Executa requisições pelo test client (sem rede)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def __call__(self, method, path, body, headers):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code, int(response.headers.get('X-Bench-SQL-Count', 0))
+
+    def close(self):
+        pass
+
+class HttpDriver:
+    """Executa requisições contra um servidor HTTP real (werkzeug, threaded)"""
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def __call__(self, method, path, body, headers):
+        data = None
+        headers = dict(headers)
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, int(response.headers.get('X-Bench-SQL-Count', 0))
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, int(e.headers.get('X-Bench-SQL-Count', 0))
+
+    def close(self):
+        self.server.shutdown()
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+def summarize(samples, elapsed):
+    latencies = sorted(s['ms'] for s in samples)
+    statuses = {}
+    for s in samples:
+        statuses[str(s['status'])] = statuses.get(str(s['status']), 0) + 1
+
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if s['status'] >= 500),
+        'statuses': statuses,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'mean': round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        },
+        'sql_per_request': round(statistics.fmean(s['sql'] for s in samples), 2) if samples else 0.0,
+    }
+
+def run(driver, scenarios, total, concurrency, rng):
+    weights = [w for _, _, w, _ in scenarios]
+    plan = [rng.choices(scenarios, weights)[0] for _ in range(total)]
+    requests = [(blueprint, name, make()) for blueprint, name, _, make in plan]
+    samples = []
+    lock = threading.Lock()
+
+    def execute(item):
+        blueprint, name, (method, path, body, headers) = item
+        start = time.perf_counter()
+        status, sql = driver(method, path, body, headers)
+        sample = {
+            'blueprint': blueprint,
+            'scenario': name,
+            'status': status,
+            'sql': sql,
+            'ms': (time.perf_counter() - start) * 1000
+        }
+        with lock:
+            samples.append(sample)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(execute, requests))
+    else:
+        for item in requests:
+            execute(item)
+    return samples, time.perf_counter() - start
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def compare(current, baseline_path):
+    """Mostrar variação de p95 por cenário em relação a uma execução anterior"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    lines = []
+    for name, result in sorted(current['scenarios'].items()):
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        old, new = before['latency_ms']['p95'], result['latency_ms']['p95']
+        change = (new - old) / old * 100 if old else 0.0
+        lines.append(f'{name:32s} p95 {old:9.3f} -> {new:9.3f} ms ({change:+6.1f}%)  '
+                     f'sql {before["sql_per_request"]:.2f} -> {result["sql_per_request"]:.2f}')
+    return '\n'.join(lines)
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    database_url = args.database_url
+    tmpdir = None
+    if not database_url:
+        tmpdir = tempfile.mkdtemp(prefix='ripple-bench-')
+        database_url = f'sqlite:///{os.path.join(tmpdir, "bench.db")}'
+
+    app = create_bench_app(database_url)
+
+    seed_start = time.perf_counter()
+    data = seed(app, args)
+    seed_seconds = time.perf_counter() - seed_start
+
+    scenarios = build_scenarios(app, data, rng)
+    if args.only:
+        selected = set(args.only.split(','))
+        scenarios = [s for s in scenarios if s[0] in selected]
+
+    driver = HttpDriver(app) if args.mode == 'http' else ClientDriver(app)
+    concurrency = args.concurrency if args.mode == 'http' else 1
+
+    try:
+        run(driver, scenarios, args.warmup, concurrency, rng)
+        samples, elapsed = run(driver, scenarios, args.requests, concurrency, rng)
+    finally:
+        driver.close()
+
+    by_scenario = {}
+    by_blueprint = {}
+    for s in samples:
+        by_scenario.setdefault(s['scenario'], []).append(s)
+        by_blueprint.setdefault(s['blueprint'], []).append(s)
+
+    result = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'database': database_url.split(':', 1)[0],
+            'mode': args.mode,
+            'concurrency': concurrency,
+            'seed': args.seed,
+            'volumes': data['counts'],
+            'seed_seconds': round(seed_seconds, 2),
+        },
+        'total': summarize(samples, elapsed),
+        'blueprints': {name: summarize(items, elapsed) for name, items in sorted(by_blueprint.items())},
+        'scenarios': {name: summarize(items, elapsed) for name, items in sorted(by_scenario.items())},
+    }
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        print(compare(result, args.compare), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark de inicialização (cold start) da aplicação
+
+Executa N processos novos e mede, em cada um: tempo de import do módulo app,
+tempo do create_app e latência da primeira requisição. Também roda
+`python -X importtime` uma vez e lista os módulos com maior tempo acumulado.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 10 --top 25
+    python benchmarks/bench_startup.py --database-url postgresql://... --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(sys.argv[1])
+created = time.perf_counter()
+client = app.test_client()
+response = client.get('/health')
+first = time.perf_counter()
+client.get('/health')
+second = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (first - created) * 1000,
+    'second_request_ms': (second - first) * 1000,
+    'status': response.status_code,
+}))
+'''
+
+def run_probe(env, config_name):
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROBE, config_name],
+        cwd=ROOT, env=env, stderr=subprocess.DEVNULL
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def import_profile(env, config_name, top):
+    """Módulos com maior tempo acumulado de import (python -X importtime)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'from app import create_app; create_app({config_name!r})'],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append({
+            'module': name.strip(),
+            'depth': depth,
+            'self_ms': int(self_us.strip()) / 1000,
+            'cumulative_ms': int(cumulative_us.strip()) / 1000,
+        })
+    total = sum(m['self_ms'] for m in modules)
+    top_level = sorted((m for m in modules if m['depth'] <= 1), key=lambda m: -m['cumulative_ms'])
+    return {
+        'total_import_ms': round(total, 2),
+        'top': top_level[:top],
+    }
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'min': round(values[0], 2),
+        'median': round(statistics.median(values), 2),
+        'max': round(values[-1], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help='Padrão: SQLite em arquivo temporário')
+    parser.add_argument('--config', default='production')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    else:
+        tmpdir = tempfile.mkdtemp(prefix='ripple-startup-')
+        env['DATABASE_URL'] = f'sqlite:///{os.path.join(tmpdir, "startup.db")}'
+        # Criar o schema uma vez; as execuções medidas não migram
+        env['AUTO_MIGRATE'] = 'true'
+        run_probe(env, args.config)
+    env['AUTO_MIGRATE'] = 'false'
+
+    runs = [run_probe(env, args.config) for _ in range(args.runs)]
+
+    result = {
+        'python': sys.version.split()[0],
+        'database': env['DATABASE_URL'].split(':', 1)[0],
+        'runs': args.runs,
+        'import_ms': summarize([r['import_ms'] for r in runs]),
+        'create_app_ms': summarize([r['create_app_ms'] for r in runs]),
+        'first_request_ms': summarize([r['first_request_ms'] for r in runs]),
+        'second_request_ms': summarize([r['second_request_ms'] for r in runs]),
+        'import_profile': import_profile(env, args.config, args.top),
+    }
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Benchmark de tipos de chave: varchar(36) x uuid nativo x bigint
+
+Cria um schema temporário por variante no PostgreSQL de DATABASE_URL, popula
+users/videos/follows com o mesmo volume e mede o tamanho dos índices e a
+latência dos joins em follows e videos.creator_id.
+
+Uso:
+    python benchmarks/bench_uuid_keys.py --users 100000 --follows 1000000 --videos 300000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from sqlalchemy import create_engine, text
+
+VARIANTS = {
+    'varchar': {
+        'type': 'varchar(36)',
+        'new_id': 'gen_random_uuid()::text',
+    },
+    'uuid': {
+        'type': 'uuid',
+        'new_id': 'gen_random_uuid()',
+    },
+    'bigint': {
+        'type': 'bigint',
+        'new_id': None,  # bigserial
+    },
+}
+
+def create_schema(conn, schema, variant, users, follows, videos):
+    key_type = variant['type']
+    if variant['new_id']:
+        pk = f"{key_type} PRIMARY KEY DEFAULT {variant['new_id']}"
+    else:
+        pk = 'bigserial PRIMARY KEY'
+
+    conn.execute(text(f'DROP SCHEMA IF EXISTS {schema} CASCADE'))
+    conn.execute(text(f'CREATE SCHEMA {schema}'))
+    conn.execute(text(f'SET search_path TO {schema}'))
+    conn.execute(text(f'''
+        CREATE TABLE users (
+            id {pk},
+            n integer NOT NULL UNIQUE,
+            name varchar(100) NOT NULL
+        )
+    '''))
+    conn.execute(text(f'''
+        CREATE TABLE follows (
+            id {pk},
+            follower_id {key_type} NOT NULL REFERENCES users (id),
+            following_id {key_type} NOT NULL REFERENCES users (id),
+            created_at timestamp DEFAULT now(),
+            CONSTRAINT unique_follow UNIQUE (follower_id, following_id)
+        )
+    '''))
+    conn.execute(text(f'''
+        CREATE TABLE videos (
+            id {pk},
+            title varchar(200) NOT NULL,
+            creator_id {key_type} NOT NULL REFERENCES users (id),
+            views integer DEFAULT 0
+        )
+    '''))
+    conn.execute(text('CREATE INDEX ix_follows_following_id ON follows (following_id)'))
+    conn.execute(text('CREATE INDEX ix_videos_creator_id ON videos (creator_id)'))
+
+    conn.execute(text('SELECT setseed(0.42)'))
+    conn.execute(text(
+        "INSERT INTO users (n, name) SELECT g, 'user ' || g FROM generate_series(1, :users) g"
+    ), {'users': users})
+    conn.execute(text('''
+        INSERT INTO follows (follower_id, following_id)
+        SELECT a.id, b.id
+        FROM (
+            SELECT (random() * (:users - 1))::int + 1 AS x,
+                   (random() * (:users - 1))::int + 1 AS y
+            FROM generate_series(1, :follows)
+        ) pairs
+        JOIN users a ON a.n = pairs.x
+        JOIN users b ON b.n = pairs.y
+        WHERE pairs.x <> pairs.y
+        ON CONFLICT DO NOTHING
+    '''), {'users': users, 'follows': follows})
+    conn.execute(text('''
+        INSERT INTO videos (title, creator_id, views)
+        SELECT 'video ' || g, u.id, (random() * 1000)::int
+        FROM generate_series(1, :videos) g
+        JOIN users u ON u.n = (g % :users) + 1
+    '''), {'users': users, 'videos': videos})
+    conn.execute(text('ANALYZE'))
+
+def index_sizes(conn, schema):
+    rows = conn.execute(text('''
+        SELECT c.relname, pg_relation_size(c.oid)
+        FROM pg_class c
+        JOIN pg_namespace ns ON ns.oid = c.relnamespace
+        WHERE ns.nspname = :schema AND c.relkind IN ('r', 'i')
+        ORDER BY c.relname
+    '''), {'schema': schema})
+    return {name: size for name, size in rows}
+
+def time_query(conn, sql, params_list):
+    timings = []
+    for params in params_list:
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'runs': len(timings),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+    }
+
+def join_latencies(conn, users, runs):
+    sample = [{'n': (i * 7919) % users + 1} for i in range(runs)]
+    return {
+        'followers_join_users': time_query(conn, '''
+            SELECT u.id, u.name
+            FROM follows f
+            JOIN users u ON u.id = f.follower_id
+            WHERE f.following_id = (SELECT id FROM users WHERE n = :n)
+        ''', sample),
+        'following_join_users': time_query(conn, '''
+            SELECT u.id, u.name
+            FROM follows f
+            JOIN users u ON u.id = f.following_id
+            WHERE f.follower_id = (SELECT id FROM users WHERE n = :n)
+        ''', sample),
+        'videos_by_creator': time_query(conn, '''
+            SELECT v.id, v.title
+            FROM videos v
+            WHERE v.creator_id = (SELECT id FROM users WHERE n = :n)
+        ''', sample),
+        'views_per_creator': time_query(conn, '''
+            SELECT u.id, sum(v.views)
+            FROM users u
+            JOIN videos v ON v.creator_id = u.id
+            GROUP BY u.id
+        ''', [{}] * max(1, runs // 100)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--follows', type=int, default=1000000)
+    parser.add_argument('--videos', type=int, default=300000)
+    parser.add_argument('--runs', type=int, default=500)
+    parser.add_argument('--variants', default=','.join(VARIANTS))
+    parser.add_argument('--keep', action='store_true', help='Não remover os schemas ao final')
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith('postgresql'):
+        sys.exit('Este benchmark requer PostgreSQL (--database-url ou DATABASE_URL)')
+
+    engine = create_engine(args.database_url)
+    results = {
+        'users': args.users,
+        'follows': args.follows,
+        'videos': args.videos,
+        'variants': {},
+    }
+
+    for name in args.variants.split(','):
+        schema = f'bench_keys_{name}'
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            create_schema(conn, schema, VARIANTS[name], args.users, args.follows, args.videos)
+            load_seconds = time.perf_counter() - start
+
+        with engine.connect() as conn:
+            conn.execute(text(f'SET search_path TO {schema}'))
+            results['variants'][name] = {
+                'load_seconds': round(load_seconds, 2),
+                'relation_bytes': index_sizes(conn, schema),
+                'latency': join_latencies(conn, args.users, args.runs),
+            }
+
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from models import db
+from migrations import db_cli, FOREIGN_KEYS, foreign_key_sql
+from seed import seed_command
+from analytics import analytics_rollup_command
+
+# Colunas de chave (tabela, coluna) convertidas entre varchar(36) e uuid
+UUID_COLUMNS = [
+    ('users', 'id'),
+    ('experiences', 'id'),
+    ('experiences', 'creator_id'),
+    ('videos', 'id'),
+    ('videos', 'creator_id'),
+    ('videos', 'experience_id'),
+    ('follows', 'id'),
+    ('follows', 'follower_id'),
+    ('follows', 'following_id'),
+    ('account_deletion_jobs', 'id'),
+    ('account_deletion_jobs', 'user_id'),
+    ('creator_daily_stats', 'creator_id'),
+]
+
+# FOREIGN_KEYS da migração 0003 mais as chaves de tabelas criadas depois dela
+UUID_FOREIGN_KEYS = FOREIGN_KEYS + [
+    ('creator_daily_stats', 'creator_id'),
+]
+
+def native_uuid_statements(revert=False):
+    """SQL para converter as chaves para uuid nativo (ou voltar para varchar(36))"""
+    target = 'varchar(36)' if revert else 'uuid'
+    cast = 'text' if revert else 'uuid'
+
+    statements = []
+    for table, column in UUID_FOREIGN_KEYS:
+        statements.append(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_fkey')
+    for table, column in UUID_COLUMNS:
+        statements.append(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE {target} USING {column}::{cast}')
+    for table, column in UUID_FOREIGN_KEYS:
+        statements.append(foreign_key_sql(table, column))
+    return statements
+
+@click.command('native-uuid')
+@click.option('--revert', is_flag=True, help='Voltar as chaves para varchar(36)')
+@click.option('--dry-run', is_flag=True, help='Apenas mostrar o SQL')
+@with_appcontext
+def native_uuid_command(revert, dry_run):
+    """Converter as chaves UUID para o tipo uuid nativo do PostgreSQL"""
+    statements = native_uuid_statements(revert)
+
+    if dry_run:
+        for statement in statements:
+            click.echo(f'{statement};')
+        return
+
+    if db.engine.dialect.name != 'postgresql':
+        raise click.ClickException('Conversão disponível apenas no PostgreSQL')
+
+    # Tudo em uma transação: em caso de erro nada é alterado
+    with db.engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+    setting = 'false' if revert else 'true'
+    click.echo(f'Chaves convertidas. Defina DB_NATIVE_UUID={setting} e reinicie a aplicação.')
+
+def register_commands(app):
+    """Registrar comandos do Flask CLI"""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(native_uuid_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(analytics_rollup_command)
@@ -0,0 +1,160 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/plain',
+    'text/html',
+    'text/csv',
+}
+
+def accepted_encodings(header):
+    """Mapear Accept-Encoding para {codificação: q}"""
+    encodings = {}
+    for part in header.split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[name] = q
+    return encodings
+
+class Compressor:
+    """Compressão gzip/brotli negociada das respostas
+
+    Respostas em memória são comprimidas de uma vez quando passam de
+    COMPRESSION_MIN_SIZE. Respostas em streaming (ex.: exportação NDJSON) são
+    comprimidas bloco a bloco com flush a cada bloco, sem bufferizar o corpo.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 4
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', False)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.level = app.config.get('COMPRESSION_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 4)
+
+        if self.enabled:
+            app.after_request(self.compress)
+
+    def choose_encoding(self):
+        encodings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        options = ['br', 'gzip'] if brotli is not None else ['gzip']
+        best = max(options, key=lambda e: (encodings.get(e, encodings.get('*', 0.0)), -options.index(e)))
+        if encodings.get(best, encodings.get('*', 0.0)) <= 0:
+            return None
+        return best
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # 31 = formato gzip
+        return (
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            lambda: compressor.flush(zlib.Z_FINISH)
+        )
+
+    def _stream(self, chunks, encoding):
+        compress, flush, finish = self._compressor(encoding)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+
+    def compress(self, response):
+        """after_request: comprimir a resposta se o cliente aceitar"""
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or request.method == 'HEAD'
+        ):
+            return response
+
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoding)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        compress, _, finish = self._compressor(encoding)
+        response.set_data(compress(data) + finish())
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+class CachePolicy:
+    """Cache-Control/Vary por rota conforme CACHE_POLICIES
+
+    Rotas GET com política recebem os headers configurados em respostas 200.
+    Requisições autenticadas sem política recebem 'private, no-store' para que
+    CDNs não guardem dados de usuário.
+    """
+
+    def __init__(self, app=None):
+        self.policies = {}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.policies = app.config.get('CACHE_POLICIES', {})
+        app.after_request(self.apply)
+
+    def apply(self, response):
+        if 'Cache-Control' in response.headers:
+            return response
+
+        policy = self.policies.get(request.endpoint)
+
+        if policy and request.method == 'GET' and response.status_code == 200:
+            response.headers['Cache-Control'] = policy['cache_control']
+            for header in policy.get('vary', []):
+                response.vary.add(header)
+        elif 'Authorization' in request.headers:
+            response.headers['Cache-Control'] = 'private, no-store'
+
+        return response
+
+compressor = Compressor()
+cache_policy = CachePolicy()
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+class FollowCache:
+    """Cache em memória do estado de follow por usuário (follower_id -> {following_id: bool})"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.ttl = 60
+        self.max_users = 10000
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Ler configurações da aplicação"""
+        self.enabled = app.config.get('FOLLOW_CACHE_ENABLED', False)
+        self.ttl = app.config.get('FOLLOW_CACHE_TTL', 60)
+        self.max_users = app.config.get('FOLLOW_CACHE_MAX_USERS', 10000)
+        self.clear()
+
+    def lookup(self, follower_id, following_ids):
+        """Retornar os estados conhecidos e a lista de ids que precisam ir ao banco"""
+        if not self.enabled:
+            return {}, list(following_ids)
+
+        with self._lock:
+            entry = self._entries.get(follower_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(follower_id, None)
+                return {}, list(following_ids)
+
+            self._entries.move_to_end(follower_id)
+            states = entry[1]
+
+        known = {}
+        missing = []
+        for following_id in following_ids:
+            if following_id in states:
+                known[following_id] = states[following_id]
+            else:
+                missing.append(following_id)
+
+        return known, missing
+
+    def store(self, follower_id, states):
+        """Guardar estados obtidos do banco"""
+        if not self.enabled or not states:
+            return
+
+        with self._lock:
+            entry = self._entries.get(follower_id)
+            if entry is None or entry[0] < time.monotonic():
+                entry = (time.monotonic() + self.ttl, {})
+                self._entries[follower_id] = entry
+
+            entry[1].update(states)
+            self._entries.move_to_end(follower_id)
+
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, follower_id):
+        """Descartar o cache de um usuário após follow/unfollow"""
+        with self._lock:
+            self._entries.pop(follower_id, None)
+
+    def clear(self):
+        """Limpar todo o cache"""
+        with self._lock:
+            self._entries.clear()
+
+follow_cache = FollowCache()
@@ -0,0 +1,336 @@
+import heapq
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from datetime import timedelta
+from sqlalchemy import select, func
+from models import db, Follow
+
+class FollowGraph:
+    """Índice em memória do grafo de follows com ids inteiros compactos
+
+    Cada usuário recebe um índice inteiro; as listas de adjacência (seguindo e
+    seguidores) são arrays ordenados de inteiros sem sinal de 4 bytes.
+    O índice é carregado na inicialização e mantido por follow_user/unfollow_user.
+    Com vários workers cada processo tem o seu próprio índice: a cada
+    FOLLOW_GRAPH_REFRESH_INTERVAL segundos ele lê só os follows criados desde a
+    última leitura (created_at) e altera os arrays no lugar, e a cada
+    FOLLOW_GRAPH_MAX_AGE segundos é recarregado por inteiro (unfollows de outros
+    workers não deixam registro). As alterações feitas durante uma leitura em
+    segundo plano são repetidas depois dela. Se a primeira carga falhar (ex.:
+    antes das migrações), ela é tentada de novo a cada refresh.
+    """
+
+    # Follows com created_at um pouco anterior à última leitura podem ter sido
+    # commitados depois dela; relê-los é seguro (add ignora duplicados)
+    REFRESH_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_age = 3600
+        self.refresh_interval = 30
+        self.max_fanout = 500
+        self.max_visits = 50000
+        self.app = None
+        self.loaded_at = None
+        self.refreshed_at = None
+        self._watermark = None
+        self._attempted_at = 0.0
+        self._reloading = False
+        self._pending = None  # alterações durante load(): (método, argumentos)
+        self._lock = threading.RLock()
+        self._reset()
+
+        if app is not None:
+            self.init_app(app)
+
+    def _reset(self):
+        self._ids = []
+        self._index = {}
+        self._out = []
+        self._in = []
+        self._edges = 0
+
+    def init_app(self, app):
+        """Ler configurações e carregar o índice"""
+        self.app = app
+        self.enabled = app.config.get('FOLLOW_GRAPH_ENABLED', False)
+        self.max_age = app.config.get('FOLLOW_GRAPH_MAX_AGE', 3600)
+        self.refresh_interval = app.config.get('FOLLOW_GRAPH_REFRESH_INTERVAL', 30)
+        self.max_fanout = app.config.get('FOLLOW_GRAPH_MAX_FANOUT', 500)
+        self.max_visits = app.config.get('FOLLOW_GRAPH_MAX_VISITS', 50000)
+
+        if self.enabled:
+            self._attempted_at = time.time()
+            with app.app_context():
+                try:
+                    self.load()
+                except Exception as e:
+                    # Tabela ainda não existe (ex.: antes das migrações)
+                    app.logger.warning(f'Índice de follows não carregado: {e}')
+
+    @property
+    def ready(self):
+        return self.enabled and self.loaded_at is not None
+
+    def load(self):
+        """Carregar todas as arestas da tabela follows"""
+        with self._lock:
+            self._pending = []
+        try:
+            watermark = db.session.scalar(select(func.max(Follow.created_at)))
+            ids, index, out_lists, in_lists, edges = self._read()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        out_arrays = [array('I', sorted(l)) for l in out_lists]
+        in_arrays = [array('I', sorted(l)) for l in in_lists]
+
+        with self._lock:
+            self._ids, self._index = ids, index
+            self._out, self._in = out_arrays, in_arrays
+            self._edges = edges
+            # Follows criados/removidos enquanto a tabela era lida podem não
+            # estar na leitura; repetir é seguro (add/remove ignoram duplicados)
+            for method, args in self._pending:
+                method(*args)
+            self._pending = None
+            self._watermark = watermark
+            self.loaded_at = self.refreshed_at = time.time()
+
+    def refresh(self):
+        """Aplicar os follows criados desde a última leitura, sem recarregar o resto"""
+        with self._lock:
+            self._pending = []
+        try:
+            stmt = select(Follow.follower_id, Follow.following_id, Follow.created_at)
+            if self._watermark is not None:
+                stmt = stmt.where(Follow.created_at >= self._watermark - self.REFRESH_OVERLAP)
+            rows = db.session.execute(stmt).all()
+            db.session.rollback()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for follower_id, following_id, created_at in rows:
+                self._add(follower_id, following_id)
+                if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+            # Unfollows locais durante a leitura não podem ser desfeitos pelas linhas lidas
+            for method, args in self._pending:
+                method(*args)
+            self._pending = None
+            self.refreshed_at = time.time()
+        return len(rows)
+
+    def _read(self):
+        ids, index, out_lists, in_lists = [], {}, [], []
+
+        def node(user_id):
+            i = index.get(user_id)
+            if i is None:
+                i = len(ids)
+                index[user_id] = i
+                ids.append(user_id)
+                out_lists.append([])
+                in_lists.append([])
+            return i
+
+        edges = 0
+        stmt = select(Follow.follower_id, Follow.following_id).execution_options(yield_per=10000)
+        for follower_id, following_id in db.session.execute(stmt):
+            a, b = node(follower_id), node(following_id)
+            out_lists[a].append(b)
+            in_lists[b].append(a)
+            edges += 1
+        db.session.rollback()
+        return ids, index, out_lists, in_lists, edges
+
+    def maybe_reload(self):
+        """Em segundo plano: carga completa se o índice nunca carregou ou passou
+        de max_age, senão leitura incremental a cada refresh_interval"""
+        if not self.enabled or self.app is None:
+            return
+
+        now = time.time()
+        if self.loaded_at is None:
+            # Primeira carga falhou: tentar de novo, no máximo uma vez por intervalo
+            if now - self._attempted_at < max(self.refresh_interval, 1):
+                return
+            action = self.load
+        elif self.max_age > 0 and now - self.loaded_at >= self.max_age:
+            action = self.load
+        elif self.refresh_interval > 0 and now - self.refreshed_at >= self.refresh_interval:
+            action = self.refresh
+        else:
+            return
+
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+            self._attempted_at = now
+
+        def run():
+            try:
+                with self.app.app_context():
+                    action()
+            except Exception as e:
+                self.app.logger.warning(f'Falha ao recarregar índice de follows: {e}')
+            finally:
+                self._reloading = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _node(self, user_id):
+        i = self._index.get(user_id)
+        if i is None:
+            i = len(self._ids)
+            self._index[user_id] = i
+            self._ids.append(user_id)
+            self._out.append(array('I'))
+            self._in.append(array('I'))
+        return i
+
+    def _apply(self, method, *args):
+        with self._lock:
+            method(*args)
+            if self._pending is not None:
+                self._pending.append((method, args))
+
+    def add(self, follower_id, following_id):
+        """Registrar um novo follow"""
+        if self.ready:
+            self._apply(self._add, follower_id, following_id)
+
+    def remove(self, follower_id, following_id):
+        """Remover um follow"""
+        if self.ready:
+            self._apply(self._remove, follower_id, following_id)
+
+    def remove_user(self, user_id):
+        """Remover todas as arestas de um usuário (exclusão de conta)"""
+        if self.ready:
+            self._apply(self._remove_user, user_id)
+
+    def _add(self, follower_id, following_id):
+        a, b = self._node(follower_id), self._node(following_id)
+        out = self._out[a]
+        pos = bisect_left(out, b)
+        if pos < len(out) and out[pos] == b:
+            return
+        out.insert(pos, b)
+        insort(self._in[b], a)
+        self._edges += 1
+
+    def _remove(self, follower_id, following_id):
+        a, b = self._index.get(follower_id), self._index.get(following_id)
+        if a is None or b is None:
+            return
+        if _discard(self._out[a], b):
+            _discard(self._in[b], a)
+            self._edges -= 1
+
+    def _remove_user(self, user_id):
+        i = self._index.get(user_id)
+        if i is None:
+            return
+        for j in self._out[i]:
+            _discard(self._in[j], i)
+        for j in self._in[i]:
+            _discard(self._out[j], i)
+        self._edges -= len(self._out[i]) + len(self._in[i])
+        self._out[i] = array('I')
+        self._in[i] = array('I')
+
+    def mutual(self, user_id):
+        """Usuários que o usuário segue e que o seguem de volta"""
+        with self._lock:
+            i = self._index.get(user_id)
+            if i is None:
+                return []
+            return [self._ids[j] for j in _intersect(self._out[i], self._in[i])]
+
+    def suggestions(self, user_id, limit=20):
+        """Sugestões de quem seguir (amigos de amigos), ordenadas por conexões em comum
+
+        A busca em 2 saltos é limitada por max_fanout vizinhos por nó e
+        max_visits arestas no total, então o tempo é limitado mesmo para
+        usuários com muitos follows.
+        """
+        with self._lock:
+            i = self._index.get(user_id)
+            if i is None:
+                return []
+
+            following = self._out[i]
+            counts = {}
+            visits = 0
+
+            for j in following[:self.max_fanout]:
+                for k in self._out[j][:self.max_fanout]:
+                    visits += 1
+                    if k != i:
+                        counts[k] = counts.get(k, 0) + 1
+                if visits >= self.max_visits:
+                    break
+
+            candidates = (
+                (count, k) for k, count in counts.items()
+                if not _contains(following, k)
+            )
+            top = heapq.nlargest(limit, candidates)
+            return [(self._ids[k], count) for count, k in top]
+
+    def stats(self):
+        """Tamanho do índice e uso aproximado de memória"""
+        with self._lock:
+            adjacency = sum(sys.getsizeof(a) for a in self._out) + sum(sys.getsizeof(a) for a in self._in)
+            ids = sys.getsizeof(self._ids) + sum(sys.getsizeof(s) for s in self._ids)
+            index = sys.getsizeof(self._index)
+            return {
+                'enabled': self.enabled,
+                'loaded_at': self.loaded_at,
+                'users': len(self._ids),
+                'edges': self._edges,
+                'memory_bytes': {
+                    'adjacency': adjacency,
+                    'ids': ids,
+                    'index': index,
+                    'total': adjacency + ids + index
+                }
+            }
+
+def _contains(arr, value):
+    pos = bisect_left(arr, value)
+    return pos < len(arr) and arr[pos] == value
+
+def _discard(arr, value):
+    pos = bisect_left(arr, value)
+    if pos < len(arr) and arr[pos] == value:
+        del arr[pos]
+        return True
+    return False
+
+def _intersect(a, b):
+    """Interseção de dois arrays ordenados"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+follow_graph = FollowGraph()
@@ -0,0 +1,48 @@
+import gc
+import os
+import signal
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Tempo para terminar as requisições em andamento após SIGTERM (drenagem)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Importar e aquecer a aplicação uma vez no mestre (imports, mappers, índice de follows)
+preload_app = True
+
+def pre_fork(server, worker):
+    # Mover os objetos já criados para a geração permanente do GC: a coleta
+    # nos workers não toca essas páginas e o copy-on-write continua valendo
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Conexões abertas no mestre não podem ser compartilhadas entre processos
+    from models import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    # SIGTERM do mestre (deploy, scale down) coloca o worker em drenagem antes
+    # do desligamento gracioso do gunicorn: /ready responde 503 e as respostas
+    # saem com Connection: close. Instalado aqui porque o worker registra os
+    # próprios handlers depois do post_fork; o handler original é mantido.
+    from readiness import readiness
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        readiness.drain()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+def worker_int(worker):
+    # SIGINT/SIGQUIT (Ctrl+C): desligamento rápido, mas o /ready já reflete a saída
+    from readiness import readiness
+
+    readiness.drain()
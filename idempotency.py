@@ -0,0 +1,227 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, current_app, make_response
+from sqlalchemy import select, delete
+from models import db, IdempotencyKey, dialect_insert
+from rate_limit import rate_limiter
+from utils import error_response
+
+class IdempotencyStore:
+    """Respostas guardadas por Idempotency-Key (tabela idempotency_keys + cache em memória)
+
+    A primeira requisição com uma chave reserva a linha (status_code NULL) com
+    INSERT ... ON CONFLICT DO NOTHING, executa a rota e grava status e corpo.
+    Repetições devolvem a resposta guardada sem executar a rota; respostas
+    recentes ficam em um LRU em memória e nem consultam o banco. Respostas 5xx
+    não são guardadas, para que o cliente possa tentar de novo. Linhas com mais
+    de IDEMPOTENCY_TTL segundos são removidas em segundo plano.
+
+    Limitação: a reserva, o commit da própria rota e a gravação da resposta são
+    transações separadas (a resposta só existe depois do commit da rota). Se o
+    processo morrer entre o commit da rota e complete(), a reserva expira após
+    IDEMPOTENCY_LOCK_TIMEOUT e uma nova tentativa executa a rota de novo.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.ttl = 86400
+        self.lock_timeout = 60
+        self.max_cached = 10000
+        self.purge_interval = 600
+        self.purge_chunk_size = 1000
+        self._entries = OrderedDict()
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Ler configurações da aplicação"""
+        self.enabled = app.config.get('IDEMPOTENCY_ENABLED', False)
+        self.ttl = app.config.get('IDEMPOTENCY_TTL', 86400)
+        self.lock_timeout = app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 60)
+        self.max_cached = app.config.get('IDEMPOTENCY_CACHE_MAX_KEYS', 10000)
+        self.purge_interval = app.config.get('IDEMPOTENCY_PURGE_INTERVAL', 600)
+        self.purge_chunk_size = app.config.get('IDEMPOTENCY_PURGE_CHUNK_SIZE', 1000)
+        self._last_purge = time.monotonic()
+        self.clear()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1:]
+
+    def _cache(self, key, fingerprint, status_code, body, created_at):
+        expires = time.monotonic() + self.ttl - (datetime.utcnow() - created_at).total_seconds()
+        with self._lock:
+            self._entries[key] = (expires, fingerprint, status_code, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_cached:
+                self._entries.popitem(last=False)
+
+    def lookup(self, key):
+        """(fingerprint, status_code, body) da chave; status_code None = em andamento"""
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        row = db.session.execute(
+            select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.body, IdempotencyKey.created_at)
+            .where(IdempotencyKey.key == key)
+        ).first()
+        db.session.rollback()
+        if row is None or self._expired(row):
+            return None
+
+        if row.status_code is not None:
+            self._cache(key, row.fingerprint, row.status_code, row.body, row.created_at)
+        return row.fingerprint, row.status_code, row.body
+
+    def _expired(self, row):
+        age = (datetime.utcnow() - row.created_at).total_seconds()
+        return age > self.ttl or (row.status_code is None and age > self.lock_timeout)
+
+    def claim(self, key, fingerprint):
+        """Reservar a chave; False se outra requisição já a reservou"""
+        for _ in range(2):
+            stmt = dialect_insert(IdempotencyKey).values(
+                key=key, fingerprint=fingerprint, created_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=['key']).returning(IdempotencyKey.key)
+            inserted = db.session.execute(stmt).first()
+            db.session.commit()
+            if inserted is not None:
+                return True
+
+            # Linha expirada ou reserva abandonada (processo morto): descartar e tentar de novo
+            row = db.session.execute(
+                select(IdempotencyKey.status_code, IdempotencyKey.created_at).where(IdempotencyKey.key == key)
+            ).first()
+            if row is not None and not self._expired(row):
+                db.session.rollback()
+                return False
+            db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            db.session.commit()
+        return False
+
+    def complete(self, key, fingerprint, response):
+        """Gravar a resposta da rota"""
+        body = response.get_data()
+        created_at = datetime.utcnow()
+        db.session.execute(
+            IdempotencyKey.__table__.update()
+            .where(IdempotencyKey.key == key)
+            .values(status_code=response.status_code, body=body, created_at=created_at)
+        )
+        db.session.commit()
+        self._cache(key, fingerprint, response.status_code, body, created_at)
+        self._maybe_purge()
+
+    def release(self, key):
+        """Liberar a chave após erro (a próxima tentativa executa a rota)"""
+        db.session.rollback()
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        db.session.commit()
+
+    def _maybe_purge(self):
+        if self.purge_interval <= 0 or time.monotonic() - self._last_purge < self.purge_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = time.monotonic()
+
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    self.purge()
+                except Exception as e:
+                    app.logger.warning(f'Falha ao remover chaves de idempotência expiradas: {e}')
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def purge(self):
+        """Remover linhas expiradas em blocos; retorna o total removido"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        total = 0
+        while True:
+            keys = select(IdempotencyKey.key).where(IdempotencyKey.created_at < cutoff).limit(self.purge_chunk_size)
+            result = db.session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys)).execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            total += result.rowcount
+            if result.rowcount < self.purge_chunk_size:
+                return total
+
+    def clear(self):
+        """Limpar o cache em memória"""
+        with self._lock:
+            self._entries.clear()
+
+idempotency_store = IdempotencyStore()
+
+def _replay(fingerprint, stored):
+    stored_fingerprint, status_code, body = stored
+    if stored_fingerprint != fingerprint:
+        return error_response('Idempotency-Key já usada com outra requisição', 422)
+    if status_code is None:
+        return error_response('Requisição com esta Idempotency-Key ainda em andamento', 409)
+    response = current_app.response_class(body, status=status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(f):
+    """Decorator para rotas POST/PATCH: repetir a resposta guardada quando o
+    header Idempotency-Key já foi usado (aplicar abaixo de token_required)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None or not idempotency_store.enabled:
+            return f(*args, **kwargs)
+
+        if not key or len(key) > 255:
+            return error_response('Idempotency-Key deve ter entre 1 e 255 caracteres', 400)
+
+        # Chaves escopadas por usuário; em rotas públicas, pelo IP do cliente
+        # (um escopo compartilhado deixaria um cliente ler a resposta de outro)
+        scope = getattr(request, 'user_db_id', None) or f'anon:{rate_limiter.client_ip()}'
+        key_hash = hashlib.sha256(f'{scope}:{key}'.encode('utf-8')).digest()
+        fingerprint = hashlib.sha256(
+            request.method.encode() + b' ' + request.path.encode('utf-8') + b'?' + request.query_string
+            + b'\n' + request.get_data()
+        ).digest()[:16]
+
+        stored = idempotency_store.lookup(key_hash)
+        if stored is not None:
+            return _replay(fingerprint, stored)
+
+        if not idempotency_store.claim(key_hash, fingerprint):
+            stored = idempotency_store.lookup(key_hash)
+            return _replay(fingerprint, stored or (fingerprint, None, None))
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            idempotency_store.release(key_hash)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            idempotency_store.release(key_hash)
+        else:
+            idempotency_store.complete(key_hash, fingerprint, response)
+        return response
+
+    return decorated
@@ -0,0 +1,290 @@
+import re
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable, CreateIndex
+from models import db
+
+MIGRATIONS_TABLE = db.Table(
+    'schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(100), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+# Chave do advisory lock do PostgreSQL (evita dois workers migrando ao mesmo tempo)
+MIGRATIONS_LOCK_ID = 7_412_001
+
+MIGRATIONS = []
+
+# Chaves estrangeiras (tabela, coluna) com nomes padrão do PostgreSQL: <tabela>_<coluna>_fkey
+FOREIGN_KEYS = [
+    ('experiences', 'creator_id'),
+    ('videos', 'creator_id'),
+    ('videos', 'experience_id'),
+    ('follows', 'follower_id'),
+    ('follows', 'following_id'),
+]
+
+def migration(version, name, transactional=True):
+    """Registrar uma migração versionada
+
+    Com transactional=False a migração roda no PostgreSQL em autocommit (ex.:
+    CREATE INDEX CONCURRENTLY) e deve poder ser repetida se falhar no meio.
+    """
+    def decorator(f):
+        MIGRATIONS.append((version, name, f, transactional))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return f
+    return decorator
+
+def create_indexes(conn, *names):
+    """Criar índices declarados nos modelos, se ainda não existirem
+
+    No PostgreSQL usa CREATE INDEX CONCURRENTLY (sem bloquear escritas; exige
+    migração não transacional). Um índice inválido deixado por uma execução
+    interrompida é removido e criado de novo.
+    """
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        if conn.dialect.name != 'postgresql':
+            indexes[name].create(conn, checkfirst=True)
+            continue
+
+        invalid = conn.execute(text(
+            'SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE c.relname = :name AND NOT i.indisvalid'
+        ), {'name': name}).first()
+        if invalid is not None:
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+
+        ddl = str(CreateIndex(indexes[name], if_not_exists=True).compile(dialect=conn.dialect))
+        conn.execute(text(re.sub(r'^CREATE (UNIQUE )?INDEX ', r'CREATE \1INDEX CONCURRENTLY ', ddl)))
+
+def foreign_key_clause(table, column):
+    """Cláusula ADD CONSTRAINT da chave estrangeira conforme declarada no modelo (incluindo ON DELETE)"""
+    fk = next(iter(db.metadata.tables[table].c[column].foreign_keys))
+    sql = (
+        f'ADD CONSTRAINT {table}_{column}_fkey '
+        f'FOREIGN KEY ({column}) REFERENCES {fk.column.table.name} ({fk.column.name})'
+    )
+    if fk.ondelete:
+        sql += f' ON DELETE {fk.ondelete}'
+    return sql
+
+def foreign_key_sql(table, column):
+    """ALTER TABLE ... ADD CONSTRAINT da chave estrangeira"""
+    return f'ALTER TABLE {table} {foreign_key_clause(table, column)}'
+
+@migration(1, 'initial_schema')
+def initial_schema(conn):
+    """Tabelas originais (equivalente ao antigo db.create_all)"""
+    for name in ('users', 'experiences', 'videos', 'follows'):
+        db.metadata.tables[name].create(conn, checkfirst=True)
+
+@migration(2, 'foreign_key_indexes', transactional=False)
+def foreign_key_indexes(conn):
+    """Índices para as consultas por criador, experiência e seguidores"""
+    create_indexes(
+        conn,
+        'ix_experiences_created_at',
+        'ix_experiences_category_created_at',
+        'ix_experiences_creator_id_created_at',
+        'ix_videos_creator_id_created_at',
+        'ix_videos_experience_id',
+        'ix_follows_following_id_created_at',
+        'ix_follows_follower_id_created_at',
+    )
+
+def rebuild_sqlite_table(conn, name):
+    """Recriar uma tabela do SQLite conforme o modelo (constraints não podem ser alteradas)
+
+    Cria a tabela nova, copia as linhas, remove a antiga, renomeia e recria os
+    índices. Requer PRAGMA foreign_keys=OFF (ver upgrade()).
+    """
+    table = db.metadata.tables[name]
+    tmp = f'_{name}_rebuild'
+    existing = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info({name})')}
+    columns = ', '.join(c.name for c in table.columns if c.name in existing)
+
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+    conn.exec_driver_sql(ddl.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {tmp} ', 1))
+    conn.exec_driver_sql(f'INSERT INTO {tmp} ({columns}) SELECT {columns} FROM {name}')
+    conn.exec_driver_sql(f'DROP TABLE {name}')
+    conn.exec_driver_sql(f'ALTER TABLE {tmp} RENAME TO {name}')
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+@migration(3, 'foreign_key_on_delete', transactional=False)
+def foreign_key_on_delete(conn):
+    """ON DELETE CASCADE/SET NULL nas chaves estrangeiras
+
+    No PostgreSQL cada constraint é trocada em um único ALTER TABLE com NOT
+    VALID (sem varrer a tabela sob lock) e validada depois, em um comando
+    separado que não bloqueia escritas. No SQLite as tabelas criadas sem as
+    regras (antigo db.create_all) são reconstruídas.
+    """
+    if conn.dialect.name == 'postgresql':
+        for table, column in FOREIGN_KEYS:
+            conn.execute(text(
+                f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_fkey, '
+                f'{foreign_key_clause(table, column)} NOT VALID'
+            ))
+        for table, column in FOREIGN_KEYS:
+            conn.execute(text(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey'))
+        return
+
+    if conn.dialect.name != 'sqlite':
+        return
+
+    for name in dict.fromkeys(table for table, _ in FOREIGN_KEYS):
+        expected = {
+            column: next(iter(db.metadata.tables[name].c[column].foreign_keys)).ondelete
+            for table, column in FOREIGN_KEYS if table == name
+        }
+        # PRAGMA foreign_key_list: (id, seq, tabela, de, para, on_update, on_delete, match)
+        current = {row[3]: row[6] for row in conn.exec_driver_sql(f'PRAGMA foreign_key_list({name})')}
+        if any(current.get(column) != action for column, action in expected.items()):
+            rebuild_sqlite_table(conn, name)
+
+@migration(4, 'account_deletion_jobs')
+def account_deletion_jobs(conn):
+    """Tabela de jobs de exclusão de conta"""
+    db.metadata.tables['account_deletion_jobs'].create(conn, checkfirst=True)
+
+@migration(5, 'idempotency_keys')
+def idempotency_keys(conn):
+    """Tabela de respostas guardadas por Idempotency-Key"""
+    db.metadata.tables['idempotency_keys'].create(conn, checkfirst=True)
+
+@migration(6, 'creator_daily_stats')
+def creator_daily_stats(conn):
+    """Tabela de agregados diários por criador (analytics)"""
+    db.metadata.tables['creator_daily_stats'].create(conn, checkfirst=True)
+
+@migration(7, 'follows_created_at_index', transactional=False)
+def follows_created_at_index(conn):
+    """Índice para a atualização incremental do índice de follows (created_at recentes)"""
+    create_indexes(conn, 'ix_follows_created_at')
+
+def applied_versions(conn):
+    MIGRATIONS_TABLE.create(conn, checkfirst=True)
+    return {row.version for row in conn.execute(db.select(MIGRATIONS_TABLE.c.version))}
+
+def record(conn, version, name):
+    conn.execute(MIGRATIONS_TABLE.insert().values(
+        version=version,
+        name=name,
+        applied_at=datetime.utcnow()
+    ))
+
+def pending(done, target):
+    return [
+        (version, name, f, transactional) for version, name, f, transactional in MIGRATIONS
+        if version not in done and (target is None or version <= target)
+    ]
+
+def upgrade(target=None):
+    """Aplicar migrações pendentes; retorna a lista de migrações aplicadas"""
+    if db.engine.dialect.name == 'postgresql':
+        return upgrade_postgresql(target)
+
+    applied = []
+
+    with db.engine.connect() as conn:
+        sqlite = conn.dialect.name == 'sqlite'
+        if sqlite:
+            # Reconstruções de tabela exigem as FKs desligadas, e o PRAGMA só
+            # vale fora de transação; a integridade é conferida antes do commit
+            conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            conn.commit()
+
+        try:
+            with conn.begin():
+                if sqlite:
+                    # O pysqlite só abre a transação antes de DML; o BEGIN explícito inclui o DDL
+                    conn.exec_driver_sql('BEGIN')
+
+                for version, name, f, _ in pending(applied_versions(conn), target):
+                    f(conn)
+                    record(conn, version, name)
+                    applied.append((version, name))
+
+                if sqlite:
+                    violations = conn.exec_driver_sql('PRAGMA foreign_key_check').fetchall()
+                    if violations:
+                        tables = sorted({row[0] for row in violations})
+                        raise RuntimeError(
+                            f'{len(violations)} linhas com chave estrangeira inválida em {", ".join(tables)} '
+                            '(veja PRAGMA foreign_key_check); nenhuma migração foi aplicada'
+                        )
+        finally:
+            if sqlite:
+                conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+                conn.commit()
+
+    return applied
+
+def upgrade_postgresql(target=None):
+    """Uma transação por migração, sob advisory lock de sessão
+
+    Migrações não transacionais rodam em uma conexão em autocommit; a versão só
+    é registrada depois que terminam.
+    """
+    applied = []
+
+    with db.engine.connect() as conn:
+        conn.execute(text('SELECT pg_advisory_lock(:id)'), {'id': MIGRATIONS_LOCK_ID})
+        conn.commit()
+        try:
+            with conn.begin():
+                todo = pending(applied_versions(conn), target)
+
+            for version, name, f, transactional in todo:
+                if transactional:
+                    with conn.begin():
+                        f(conn)
+                        record(conn, version, name)
+                else:
+                    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as autocommit:
+                        f(autocommit)
+                    with conn.begin():
+                        record(conn, version, name)
+                applied.append((version, name))
+        finally:
+            conn.rollback()
+            conn.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': MIGRATIONS_LOCK_ID})
+            conn.commit()
+
+    return applied
+
+def status():
+    """Listar migrações com o estado de cada uma"""
+    with db.engine.begin() as conn:
+        done = applied_versions(conn)
+    return [(version, name, version in done) for version, name, _, _ in MIGRATIONS]
+
+@click.group('db')
+def db_cli():
+    """Migrações do banco de dados"""
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Aplicar até esta versão')
+@with_appcontext
+def upgrade_command(target):
+    """Aplicar migrações pendentes"""
+    applied = upgrade(target)
+
+    if not applied:
+        click.echo('Banco de dados já está atualizado.')
+    for version, name in applied:
+        click.echo(f'Aplicada {version:04d}_{name}')
+
+@db_cli.command('status')
+@with_appcontext
+def status_command():
+    """Mostrar migrações aplicadas e pendentes"""
+    for version, name, is_applied in status():
+        state = 'aplicada' if is_applied else 'pendente'
+        click.echo(f'{version:04d}_{name}: {state}')
@@ -1,15 +1,65 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
-import bcrypt
 import uuid
+from tracing import traced
 
 db = SQLAlchemy()
 
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Ativar chaves estrangeiras no SQLite (ON DELETE CASCADE/SET NULL como no PostgreSQL)"""
+    if type(dbapi_connection).__module__ == 'sqlite3':
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+def dialect_insert(model):
+    """Criar INSERT com suporte a ON CONFLICT para o banco em uso (PostgreSQL ou SQLite)"""
+    # Módulos de dialeto importados sob demanda (só o do banco em uso é carregado)
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects import postgresql
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects import sqlite
+        return sqlite.insert(model)
+    raise NotImplementedError(f'ON CONFLICT não suportado para o banco {dialect}')
+
+class GUID(db.TypeDecorator):
+    """Chave UUID: coluna uuid nativa no PostgreSQL (DB_NATIVE_UUID) ou String(36)
+
+    Os valores continuam sendo str no Python. Com a coluna nativa, valores que
+    não são UUID válidos viram NULL na consulta (não encontram nenhuma linha)
+    em vez de gerar erro de sintaxe no PostgreSQL.
+    """
+    impl = db.String(36)
+    cache_ok = True
+    native = False
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql' and GUID.native:
+            from sqlalchemy.dialects import postgresql
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(db.String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'postgresql' or not GUID.native:
+            return value
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None
+
+def new_id():
+    return str(uuid.uuid4())
+
 class User(db.Model):
     """Modelo de usuário"""
     __tablename__ = 'users'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(GUID, primary_key=True, default=new_id)
     user_id = db.Column(db.String(50), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(255), unique=True, nullable=True)
@@ -21,20 +71,23 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relacionamentos
-    created_experiences = db.relationship('Experience', backref='creator', lazy=True, foreign_keys='Experience.creator_id')
-    created_videos = db.relationship('Video', backref='creator', lazy=True, foreign_keys='Video.creator_id')
-    followers = db.relationship('Follow', backref='follower_user', lazy=True, foreign_keys='Follow.follower_id')
-    following = db.relationship('Follow', backref='following_user', lazy=True, foreign_keys='Follow.following_id')
+    # Relacionamentos (remoções em cascata ficam a cargo do banco: passive_deletes)
+    created_experiences = db.relationship('Experience', backref='creator', lazy=True, foreign_keys='Experience.creator_id', passive_deletes=True)
+    created_videos = db.relationship('Video', backref='creator', lazy=True, foreign_keys='Video.creator_id', passive_deletes=True)
+    followers = db.relationship('Follow', backref='follower_user', lazy=True, foreign_keys='Follow.follower_id', passive_deletes=True)
+    following = db.relationship('Follow', backref='following_user', lazy=True, foreign_keys='Follow.following_id', passive_deletes=True)
     
     def set_password(self, password):
         """Hash da senha"""
+        import bcrypt  # sob demanda: só signup/login precisam
         self.password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
     
     def check_password(self, password):
         """Verificar senha"""
+        import bcrypt
         return bcrypt.checkpw(password.encode('utf-8'), self.password.encode('utf-8'))
     
+    @traced('to_dict')
     def to_dict(self):
         """Converter para dicionário"""
         return {
@@ -54,7 +107,7 @@ class Experience(db.Model):
     """Modelo de experiência"""
     __tablename__ = 'experiences'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(GUID, primary_key=True, default=new_id)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     category = db.Column(db.String(50), nullable=False)
@@ -63,14 +116,21 @@ class Experience(db.Model):
     is_live = db.Column(db.Boolean, default=False)
     participants = db.Column(db.Integer, default=0)
     engagement = db.Column(db.Integer, default=0)
-    creator_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    creator_id = db.Column(GUID, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     creator_name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_experiences_created_at', 'created_at'),
+        db.Index('ix_experiences_category_created_at', 'category', 'created_at'),
+        db.Index('ix_experiences_creator_id_created_at', 'creator_id', 'created_at'),
+    )
+    
     # Relacionamentos
-    videos = db.relationship('Video', backref='experience', lazy=True)
+    videos = db.relationship('Video', backref='experience', lazy=True, passive_deletes=True)
     
+    @traced('to_dict')
     def to_dict(self):
         """Converter para dicionário"""
         return {
@@ -93,19 +153,25 @@ class Video(db.Model):
     """Modelo de vídeo"""
     __tablename__ = 'videos'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(GUID, primary_key=True, default=new_id)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     url = db.Column(db.String(500), nullable=False)
     thumbnail = db.Column(db.String(500), nullable=True)
     duration = db.Column(db.Integer, nullable=False)
     views = db.Column(db.Integer, default=0)
-    creator_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    creator_id = db.Column(GUID, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     creator_name = db.Column(db.String(100), nullable=False)
-    experience_id = db.Column(db.String(36), db.ForeignKey('experiences.id'), nullable=True)
+    experience_id = db.Column(GUID, db.ForeignKey('experiences.id', ondelete='SET NULL'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_videos_creator_id_created_at', 'creator_id', 'created_at'),
+        db.Index('ix_videos_experience_id', 'experience_id'),
+    )
+    
+    @traced('to_dict')
     def to_dict(self):
         """Converter para dicionário"""
         return {
@@ -127,13 +193,19 @@ class Follow(db.Model):
     """Modelo de relacionamento de seguidores"""
     __tablename__ = 'follows'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    follower_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    following_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    id = db.Column(GUID, primary_key=True, default=new_id)
+    follower_id = db.Column(GUID, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    following_id = db.Column(GUID, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('follower_id', 'following_id', name='unique_follow'),)
+    __table_args__ = (
+        db.UniqueConstraint('follower_id', 'following_id', name='unique_follow'),
+        db.Index('ix_follows_following_id_created_at', 'following_id', 'created_at'),
+        db.Index('ix_follows_follower_id_created_at', 'follower_id', 'created_at'),
+        db.Index('ix_follows_created_at', 'created_at'),
+    )
     
+    @traced('to_dict')
     def to_dict(self):
         """Converter para dicionário"""
         return {
@@ -142,3 +214,56 @@ class Follow(db.Model):
             'following_id': self.following_id,
             'created_at': self.created_at.isoformat()
         }
+
+class AccountDeletionJob(db.Model):
+    """Job de exclusão de conta executado em segundo plano"""
+    __tablename__ = 'account_deletion_jobs'
+    
+    id = db.Column(GUID, primary_key=True, default=new_id)
+    user_id = db.Column(GUID, nullable=False, index=True)  # sem FK: o usuário é removido pelo próprio job
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    deleted = db.Column(db.JSON, nullable=True, default=dict)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @traced('to_dict')
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'deleted': self.deleted,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+class IdempotencyKey(db.Model):
+    """Resposta guardada de uma requisição com Idempotency-Key"""
+    __tablename__ = 'idempotency_keys'
+    
+    key = db.Column(db.LargeBinary(32), primary_key=True)  # sha256 de '<usuário>:<chave>'
+    fingerprint = db.Column(db.LargeBinary(16), nullable=False)  # método, rota e corpo da requisição
+    status_code = db.Column(db.SmallInteger, nullable=True)  # NULL enquanto a requisição está em andamento
+    body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class CreatorDailyStats(db.Model):
+    """Agregados diários por criador, preenchidos pelo job de analytics (analytics.py)"""
+    __tablename__ = 'creator_daily_stats'
+    
+    creator_id = db.Column(GUID, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # dia em UTC
+    new_followers = db.Column(db.Integer, nullable=False, default=0)
+    experiences_created = db.Column(db.Integer, nullable=False, default=0)
+    videos_created = db.Column(db.Integer, nullable=False, default=0)
+    # Ganho no dia e total no momento do rollup (views e engagement são contadores
+    # sem histórico); NULL nos dias sem rollup do total
+    views = db.Column(db.BigInteger, nullable=False, default=0)
+    views_total = db.Column(db.BigInteger, nullable=True)
+    engagement = db.Column(db.BigInteger, nullable=False, default=0)
+    engagement_total = db.Column(db.BigInteger, nullable=True)
+    followers_total = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
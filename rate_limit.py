@@ -0,0 +1,291 @@
+import importlib
+import threading
+import time
+from flask import request, jsonify, g
+
+PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+def parse_limit(value):
+    """Converter '10/minute' em (capacidade, tokens por segundo)"""
+    count, period = value.split('/')
+    count = float(count)
+    return count, count / PERIODS[period.strip()]
+
+def limited_response(message, status_code, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status_code
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+class MemoryBackend:
+    """Token buckets em memória do processo, sem locks
+
+    Cada bucket é uma tupla (tokens, timestamp) substituída de uma vez no dict
+    (atribuição atômica sob o GIL). Requisições simultâneas na mesma chave podem
+    ultrapassar o limite em no máximo uma ficha por thread, o que é aceitável
+    para limitar abuso e evita contenção em um lock global.
+    """
+
+    SWEEP_EVERY = 10000
+
+    def __init__(self, app=None):
+        self._buckets = {}
+        self._ops = 0
+
+    def consume(self, key, capacity, refill_rate):
+        """Consumir uma ficha; retorna (permitido, segundos até a próxima ficha)"""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill_rate)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            allowed, retry_after = True, 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            allowed, retry_after = False, (1 - tokens) / refill_rate
+
+        self._ops += 1
+        if self._ops % self.SWEEP_EVERY == 0:
+            self._sweep(now)
+
+        return allowed, retry_after
+
+    def _sweep(self, now):
+        """Descartar buckets ociosos há mais de uma hora (já estariam cheios)"""
+        for key, (_, last) in list(self._buckets.items()):
+            if now - last > 3600:
+                self._buckets.pop(key, None)
+
+    def reset(self):
+        self._buckets.clear()
+
+class RedisBackend:
+    """Token buckets compartilhados entre processos via Redis (dependência opcional)"""
+
+    SCRIPT = '''
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or capacity
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + (now - ts) * rate)
+        local allowed = 0
+        local retry_after = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        else
+            retry_after = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return {allowed, tostring(retry_after)}
+    '''
+
+    def __init__(self, app):
+        import redis
+
+        self.client = redis.Redis.from_url(app.config['RATE_LIMIT_REDIS_URL'])
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def consume(self, key, capacity, refill_rate):
+        allowed, retry_after = self.script(keys=[f'ratelimit:{key}'], args=[capacity, refill_rate, time.time()])
+        return bool(allowed), float(retry_after)
+
+    def reset(self):
+        pass
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'redis': RedisBackend,
+}
+
+def load_backend(name, app):
+    """Backend por nome ('memory', 'redis') ou caminho 'modulo:Classe'"""
+    if name in BACKENDS:
+        return BACKENDS[name](app)
+    module_name, class_name = name.split(':')
+    return getattr(importlib.import_module(module_name), class_name)(app)
+
+class RateLimiter:
+    """Limite de requisições por IP (todas as rotas) e por usuário autenticado
+
+    Os limites vêm de RATE_LIMITS (por IP) e USER_RATE_LIMITS (por usuário),
+    procurando primeiro o endpoint ('users.login'), depois o blueprint
+    ('users') e por fim 'default'.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.backend = None
+        self.ip_limits = {}
+        self.user_limits = {}
+        self.trust_proxy = False
+        self.proxy_hops = 1
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', False)
+        self.trust_proxy = app.config.get('RATE_LIMIT_TRUST_PROXY', False)
+        self.proxy_hops = max(1, app.config.get('RATE_LIMIT_PROXY_HOPS', 1))
+        self.ip_limits = {k: parse_limit(v) for k, v in app.config.get('RATE_LIMITS', {}).items()}
+        self.user_limits = {k: parse_limit(v) for k, v in app.config.get('USER_RATE_LIMITS', {}).items()}
+
+        if not self.enabled:
+            return
+
+        self.backend = load_backend(app.config.get('RATE_LIMIT_BACKEND', 'memory'), app)
+        app.before_request(self.check_ip)
+
+        if not self.trust_proxy and self.ip_limits and not (app.debug or app.testing):
+            app.logger.warning(
+                'Rate limiting por IP sem RATE_LIMIT_TRUST_PROXY: atrás de proxy todos os clientes '
+                'compartilham o IP dele e os limites valem para o site inteiro'
+            )
+
+    def _rule(self, limits):
+        endpoint = request.endpoint or ''
+        for name in (endpoint, endpoint.split('.')[0], 'default'):
+            if name in limits:
+                return name, limits[name]
+        return None, None
+
+    def client_ip(self):
+        """IP do cliente; com proxy confiável, a entrada de X-Forwarded-For
+        adicionada pelo primeiro dos RATE_LIMIT_PROXY_HOPS proxies (contando da
+        direita), já que as entradas à esquerda vêm do próprio cliente"""
+        if self.trust_proxy:
+            forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+            if len(forwarded) >= self.proxy_hops:
+                return forwarded[-self.proxy_hops]
+        return request.remote_addr or 'unknown'
+
+    def _check(self, scope, identity, limits):
+        name, rule = self._rule(limits)
+        if rule is None:
+            return None
+
+        capacity, refill_rate = rule
+        allowed, retry_after = self.backend.consume(f'{scope}:{identity}:{name}', capacity, refill_rate)
+        if allowed:
+            return None
+        return limited_response('Muitas requisições, tente novamente mais tarde', 429, retry_after)
+
+    def check_ip(self):
+        """before_request: limite por IP"""
+        if request.endpoint in (None, 'health', 'ready', 'static'):
+            return None
+        return self._check('ip', self.client_ip(), self.ip_limits)
+
+    def check_user(self, user_db_id):
+        """Chamado por token_required após validar o token: limite por usuário"""
+        if not self.enabled or not user_db_id:
+            return None
+        return self._check('user', user_db_id, self.user_limits)
+
+class LoadShedder:
+    """Limite adaptativo de concorrência com descarte de carga (503 + Retry-After)
+
+    Rejeita requisições quando o tempo em fila (header X-Request-Start do proxy)
+    passa de LOAD_SHEDDING_MAX_QUEUE_MS ou quando as requisições em andamento
+    excedem o limite atual. O limite segue AIMD sobre a média móvel da latência:
+    cresce devagar enquanto ela fica abaixo do alvo e cai 10% quando passa, no
+    máximo uma vez a cada `limit` requisições concluídas (uma janela), para que
+    as requisições da mesma rajada não derrubem o limite até o mínimo.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.in_flight = 0
+        self.limit = 0.0
+        self.latency_ms = 0.0
+        self._since_decrease = 0
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('LOAD_SHEDDING_ENABLED', False)
+        self.max_queue_ms = app.config.get('LOAD_SHEDDING_MAX_QUEUE_MS', 500)
+        self.target_latency_ms = app.config.get('LOAD_SHEDDING_TARGET_LATENCY_MS', 250)
+        self.min_limit = app.config.get('LOAD_SHEDDING_MIN_CONCURRENCY', 4)
+        self.max_limit = app.config.get('LOAD_SHEDDING_MAX_CONCURRENCY', 64)
+        self.retry_after = app.config.get('LOAD_SHEDDING_RETRY_AFTER', 1)
+        self.limit = float(self.max_limit)
+        self.latency_ms = 0.0
+        self.in_flight = 0
+        self._since_decrease = 0
+
+        if not self.enabled:
+            return
+
+        app.before_request(self.admit)
+        app.teardown_request(self.release)
+
+    def _queue_ms(self):
+        """Tempo em fila a partir de X-Request-Start ('t=<epoch>' em s, ms ou µs)"""
+        header = request.headers.get('X-Request-Start')
+        if not header:
+            return None
+        try:
+            value = float(header.replace('t=', ''))
+        except ValueError:
+            return None
+        while value > 1e11:  # ms ou µs -> s
+            value /= 1000
+        return (time.time() - value) * 1000
+
+    def admit(self):
+        """before_request: aceitar ou descartar a requisição"""
+        if request.endpoint in ('health', 'ready'):
+            return None
+
+        queue_ms = self._queue_ms()
+        if queue_ms is not None and queue_ms > self.max_queue_ms:
+            return limited_response('Servidor sobrecarregado, tente novamente', 503, self.retry_after)
+
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return limited_response('Servidor sobrecarregado, tente novamente', 503, self.retry_after)
+            self.in_flight += 1
+
+        g.load_shed_start = time.perf_counter()
+        return None
+
+    def release(self, exc=None):
+        """teardown_request: liberar a vaga e ajustar o limite"""
+        start = g.pop('load_shed_start', None)
+        if start is None:
+            return
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.in_flight -= 1
+            self.latency_ms = 0.9 * self.latency_ms + 0.1 * latency_ms
+            self._since_decrease += 1
+            if self.latency_ms > self.target_latency_ms:
+                if self._since_decrease >= self.limit:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                    self._since_decrease = 0
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'limit': int(self.limit),
+            'latency_ms': round(self.latency_ms, 2)
+        }
+
+rate_limiter = RateLimiter()
+load_shedder = LoadShedder()
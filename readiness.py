@@ -0,0 +1,215 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from flask import g
+from models import db
+from rate_limit import load_shedder
+
+REPLICA_LAG_SQL = text(
+    'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+)
+
+class Readiness:
+    """Prontidão do worker para o load balancer (/ready)
+
+    Verifica o banco com SELECT 1 em uma thread separada, limitado por
+    READY_DB_TIMEOUT, e guarda o resultado por READY_CACHE_TTL segundos para
+    que os probes não sobrecarreguem o PostgreSQL. Só existe uma verificação
+    em andamento por processo: se o banco travar, as próximas esperam a mesma.
+    Também informa a ocupação do pool, o atraso das réplicas (READY_REPLICA_URLS,
+    verificadas em outra thread, com connect_timeout e statement_timeout próprios,
+    para que uma réplica lenta não afete o resultado do banco principal) e as
+    requisições em andamento. O worker entra em drenagem com drain() ou
+    quando o arquivo READY_DRAIN_FILE existe.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.in_flight = 0
+        self.db_timeout = 2.0
+        self.cache_ttl = 2.0
+        self.max_pool_saturation = 1.0
+        self.replica_urls = []
+        self.replica_max_lag = 30
+        self.drain_file = None
+        self._draining = False
+        self._replicas = {}
+        self._result = None
+        self._checked_at = 0.0
+        self._pending = None
+        self._replica_pending = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='readiness')
+        self._replica_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='readiness-replicas')
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.db_timeout = app.config.get('READY_DB_TIMEOUT', 2.0)
+        self.cache_ttl = app.config.get('READY_CACHE_TTL', 2.0)
+        self.max_pool_saturation = app.config.get('READY_POOL_MAX_SATURATION', 1.0)
+        self.replica_urls = app.config.get('READY_REPLICA_URLS', [])
+        self.replica_max_lag = app.config.get('READY_REPLICA_MAX_LAG', 30)
+        self.drain_file = app.config.get('READY_DRAIN_FILE') or None
+        self._draining = False
+        self._result = None
+        self._checked_at = 0.0
+        self.in_flight = 0
+
+        app.before_request(self._start_request)
+        app.teardown_request(self._end_request)
+        app.after_request(self._close_when_draining)
+
+    def _start_request(self):
+        with self._lock:
+            self.in_flight += 1
+        g.readiness_counted = True
+
+    def _end_request(self, exc=None):
+        if g.pop('readiness_counted', False):
+            with self._lock:
+                self.in_flight -= 1
+
+    def _close_when_draining(self, response):
+        """Durante a drenagem, fechar conexões keep-alive para o cliente reconectar em outro worker"""
+        if self.draining:
+            response.headers['Connection'] = 'close'
+        return response
+
+    @property
+    def draining(self):
+        return self._draining or (self.drain_file is not None and os.path.exists(self.drain_file))
+
+    def drain(self):
+        """Marcar o worker como em drenagem (/ready passa a responder 503)"""
+        self._draining = True
+
+    def _replica_engine(self, url):
+        engine = self._replicas.get(url)
+        if engine is None:
+            # Limites no próprio driver: uma réplica travada não prende a thread indefinidamente
+            engine = create_engine(
+                url, pool_size=1, max_overflow=0, pool_pre_ping=True, pool_timeout=self.db_timeout,
+                connect_args={
+                    'connect_timeout': max(1, math.ceil(self.db_timeout)),
+                    'options': f'-c statement_timeout={int(self.db_timeout * 1000)}'
+                }
+            )
+            self._replicas[url] = engine
+        return engine
+
+    def _probe_database(self):
+        """Executado na thread de verificação: banco principal"""
+        with self.app.app_context():
+            start = time.perf_counter()
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+                return {'ok': True, 'latency_ms': round((time.perf_counter() - start) * 1000, 2)}
+            except Exception as e:
+                return {'ok': False, 'error': str(e).splitlines()[0]}
+
+    def _probe_replicas(self):
+        """Executado na thread das réplicas: atraso de replicação de cada URL"""
+        replicas = []
+        for url in self.replica_urls:
+            host = url.rsplit('@', 1)[-1]  # sem credenciais
+            try:
+                with self._replica_engine(url).connect() as conn:
+                    lag = float(conn.execute(REPLICA_LAG_SQL).scalar())
+                replicas.append({'host': host, 'ok': lag <= self.replica_max_lag, 'lag_seconds': round(lag, 3)})
+            except Exception as e:
+                replicas.append({'host': host, 'ok': False, 'error': str(e).splitlines()[0]})
+        return replicas
+
+    def _dependencies(self):
+        """Resultado da última verificação, refeita quando passa de cache_ttl"""
+        with self._lock:
+            if self._result is not None and time.monotonic() - self._checked_at < self.cache_ttl:
+                return dict(self._result, cached=True)
+            if self._pending is None or self._pending.done():
+                self._pending = self._executor.submit(self._probe_database)
+            if self.replica_urls and (self._replica_pending is None or self._replica_pending.done()):
+                self._replica_pending = self._replica_executor.submit(self._probe_replicas)
+            pending, replica_pending = self._pending, self._replica_pending
+
+        deadline = time.monotonic() + self.db_timeout
+        try:
+            database = pending.result(timeout=self.db_timeout)
+        except TimeoutError:
+            database = {'ok': False, 'error': f'sem resposta em {self.db_timeout}s'}
+        except Exception as e:
+            database = {'ok': False, 'error': str(e)}
+
+        # As réplicas rodam em paralelo, dentro do mesmo prazo; sem resposta, só elas ficam com erro
+        replicas = []
+        if self.replica_urls and replica_pending is not None:
+            try:
+                replicas = replica_pending.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                replicas = [
+                    {'host': url.rsplit('@', 1)[-1], 'ok': False, 'error': f'sem resposta em {self.db_timeout}s'}
+                    for url in self.replica_urls
+                ]
+            except Exception as e:
+                replicas = [{'host': url.rsplit('@', 1)[-1], 'ok': False, 'error': str(e)} for url in self.replica_urls]
+
+        result = {'database': database, 'replicas': replicas}
+
+        with self._lock:
+            self._result = result
+            self._checked_at = time.monotonic()
+        return dict(result, cached=False)
+
+    def pool_stats(self):
+        """Conexões em uso no pool do SQLAlchemy (None para pools sem limite, ex.: SQLite)"""
+        pool = db.engine.pool
+        if not isinstance(pool, QueuePool):
+            return None
+        max_overflow = max(pool._max_overflow, 0)
+        capacity = pool.size() + max_overflow
+        checked_out = pool.checkedout()
+        return {
+            'size': pool.size(),
+            'max_overflow': max_overflow,
+            'checked_out': checked_out,
+            'saturation': round(checked_out / capacity, 3) if capacity else 0.0
+        }
+
+    def check(self):
+        """Estado de prontidão; retorna (corpo, status HTTP)"""
+        dependencies = self._dependencies()
+        pool = self.pool_stats()
+        requests = {'in_flight': self.in_flight}
+        if load_shedder.enabled:
+            requests['load_shedding'] = load_shedder.stats()
+
+        draining = self.draining
+        pool_ok = pool is None or pool['saturation'] < self.max_pool_saturation
+        ready = not draining and dependencies['database']['ok'] and pool_ok
+
+        if draining:
+            status = 'draining'
+        elif ready:
+            status = 'ready'
+        else:
+            status = 'unavailable'
+
+        body = {
+            'status': status,
+            'checks': {
+                'database': dict(dependencies['database'], cached=dependencies['cached']),
+                'pool': pool,
+                'replicas': dependencies['replicas'],
+                'requests': requests
+            }
+        }
+        return body, 200 if ready else 503
+
+readiness = Readiness()
@@ -1,6 +1,8 @@
 from flask import Blueprint, request
+from sqlalchemy import delete
 from models import db, Experience
 from utils import token_required, error_response, success_response
+from idempotency import idempotent
 
 experiences_bp = Blueprint('experiences', __name__, url_prefix='/api/experiences')
 
@@ -73,6 +75,7 @@ def get_experiences_by_creator(creator_id):
 
 @experiences_bp.route('', methods=['POST'])
 @token_required
+@idempotent
 def create_experience():
     """Criar nova experiência"""
     try:
@@ -109,6 +112,7 @@ def create_experience():
 
 @experiences_bp.route('/<experience_id>', methods=['PATCH'])
 @token_required
+@idempotent
 def update_experience(experience_id):
     """Atualizar experiência"""
     try:
@@ -153,17 +157,20 @@ def update_experience(experience_id):
 def delete_experience(experience_id):
     """Deletar experiência"""
     try:
-        experience = Experience.query.get(experience_id)
+        # DELETE ... RETURNING; vídeos vinculados ficam com experience_id NULL pelo banco (ON DELETE SET NULL)
+        stmt = delete(Experience).where(
+            Experience.id == experience_id,
+            Experience.creator_id == request.user_db_id
+        ).returning(Experience.id)
         
-        if not experience:
-            return error_response('Experiência não encontrada', 404)
+        deleted = db.session.execute(stmt).first()
+        db.session.commit()
         
-        if experience.creator_id != request.user_db_id:
+        if deleted is None:
+            if not db.session.get(Experience, experience_id):
+                return error_response('Experiência não encontrada', 404)
             return error_response('Você não tem permissão para deletar esta experiência', 403)
         
-        db.session.delete(experience)
-        db.session.commit()
-        
         return success_response(None, 'Experiência deletada com sucesso')
     
     except Exception as e:
@@ -1,74 +1,169 @@
-from flask import Blueprint, request
-from models import db, Follow, User
+from flask import Blueprint, request, current_app
+from sqlalchemy import select, delete, literal
+from datetime import datetime
+from models import db, Follow, User, dialect_insert
+from follow_cache import follow_cache
+from follow_graph import follow_graph
 from utils import token_required, error_response, success_response
+from idempotency import idempotent
+import uuid
 
 follows_bp = Blueprint('follows', __name__, url_prefix='/api/follows')
 
 @follows_bp.route('', methods=['POST'])
 @token_required
+@idempotent
 def follow_user():
     """Seguir um usuário"""
     try:
         data = request.get_json()
         
-        follower_id = data.get('followerId')
+        # Sempre o usuário do token; followerId só é aceito se for ele mesmo
+        follower_id = request.user_db_id
+        if data.get('followerId') not in (None, follower_id):
+            return error_response('Você não tem permissão para seguir em nome de outro usuário', 403)
         following_id = data.get('followingId')
         
-        if not follower_id or not following_id:
-            return error_response('followerId e followingId são obrigatórios', 400)
+        if not following_id:
+            return error_response('followingId é obrigatório', 400)
         
         # Verificar se está tentando seguir a si mesmo
         if follower_id == following_id:
             return error_response('Você não pode seguir a si mesmo', 400)
         
-        # Verificar se o usuário existe
-        following_user = User.query.get(following_id)
-        if not following_user:
-            return error_response('Usuário não encontrado', 404)
+        # INSERT ... SELECT WHERE EXISTS (usuários) ON CONFLICT DO NOTHING RETURNING
+        # em um único comando, sem corrida com a constraint unique_follow
+        values = select(
+            literal(str(uuid.uuid4()), Follow.id.type),
+            literal(follower_id, Follow.follower_id.type),
+            literal(following_id, Follow.following_id.type),
+            literal(datetime.utcnow(), Follow.created_at.type)
+        ).where(
+            select(User.id).where(User.id == following_id).exists(),
+            # Conta do token já excluída: 404 em vez de violar a chave estrangeira
+            select(User.id).where(User.id == follower_id).exists()
+        )
         
-        # Verificar se já está seguindo
-        existing_follow = Follow.query.filter_by(
-            follower_id=follower_id,
-            following_id=following_id
-        ).first()
+        stmt = dialect_insert(Follow).from_select(
+            ['id', 'follower_id', 'following_id', 'created_at'], values
+        ).on_conflict_do_nothing(
+            index_elements=['follower_id', 'following_id']
+        ).returning(*Follow.__table__.c)
         
-        if existing_follow:
+        row = db.session.execute(stmt).first()
+        db.session.commit()
+        
+        if row is None:
+            # Nada inserido: usuário inexistente ou follow já existente
+            if not db.session.get(User, following_id) or not db.session.get(User, follower_id):
+                return error_response('Usuário não encontrado', 404)
             return error_response('Você já está seguindo este usuário', 409)
         
-        # Criar follow
-        follow = Follow(
-            follower_id=follower_id,
-            following_id=following_id
-        )
+        follow_cache.invalidate(follower_id)
+        follow_graph.add(follower_id, following_id)
+        
+        return success_response(Follow(**row._mapping).to_dict(), 'Usuário seguido com sucesso', 201)
+    
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'Erro ao seguir usuário: {str(e)}', 500)
+
+@follows_bp.route('/batch', methods=['POST'])
+@token_required
+@idempotent
+def follow_users_batch():
+    """Seguir vários usuários de uma vez (importação de contatos)"""
+    try:
+        data = request.get_json()
+        
+        # Sempre o usuário do token; followerId só é aceito se for ele mesmo
+        follower_id = request.user_db_id
+        if data.get('followerId') not in (None, follower_id):
+            return error_response('Você não tem permissão para seguir em nome de outro usuário', 403)
+        
+        following_ids = data.get('followingIds')
+        
+        if not isinstance(following_ids, list) or not following_ids:
+            return error_response('followingIds é obrigatório', 400)
+        
+        # Remover duplicados e o próprio usuário, mantendo a ordem
+        following_ids = [i for i in dict.fromkeys(str(i) for i in following_ids) if i != follower_id]
+        
+        max_ids = current_app.config['FOLLOW_IMPORT_MAX_IDS']
+        if len(following_ids) > max_ids:
+            return error_response(f'Máximo de {max_ids} ids por requisição', 400)
+        
+        # Na mesma consulta, o próprio seguidor (conta do token já excluída: 404)
+        rows = db.session.query(User.id).filter(User.id.in_(following_ids + [follower_id])).all()
+        existing = {row.id for row in rows}
+        if follower_id not in existing:
+            return error_response('Usuário não encontrado', 404)
+        existing.discard(follower_id)
+        
+        targets = [i for i in following_ids if i in existing]
+        followed = []
+        
+        if targets:
+            now = datetime.utcnow()
+            stmt = dialect_insert(Follow).values([
+                {
+                    'id': str(uuid.uuid4()),
+                    'follower_id': follower_id,
+                    'following_id': following_id,
+                    'created_at': now
+                }
+                for following_id in targets
+            ]).on_conflict_do_nothing(
+                index_elements=['follower_id', 'following_id']
+            ).returning(Follow.following_id)
+            
+            followed = [row.following_id for row in db.session.execute(stmt)]
         
-        db.session.add(follow)
         db.session.commit()
         
-        return success_response(follow.to_dict(), 'Usuário seguido com sucesso', 201)
+        if followed:
+            follow_cache.invalidate(follower_id)
+        for following_id in followed:
+            follow_graph.add(follower_id, following_id)
+        
+        followed_set = set(followed)
+        
+        return success_response({
+            'followed': followed,
+            'already_following': [i for i in targets if i not in followed_set],
+            'not_found': [i for i in following_ids if i not in existing]
+        }, 'Importação de follows concluída')
     
     except Exception as e:
         db.session.rollback()
-        return error_response(f'Erro ao seguir usuário: {str(e)}', 500)
+        return error_response(f'Erro ao seguir usuários: {str(e)}', 500)
 
 @follows_bp.route('/<follower_id>/<following_id>', methods=['DELETE'])
 @token_required
 def unfollow_user(follower_id, following_id):
     """Deixar de seguir um usuário"""
     try:
+        if follower_id != request.user_db_id:
+            return error_response('Você não tem permissão para deixar de seguir em nome de outro usuário', 403)
+        
         # Verificar se está tentando deixar de seguir a si mesmo
         if follower_id == following_id:
             return error_response('Você não pode deixar de seguir a si mesmo', 400)
         
-        follow = Follow.query.filter_by(
-            follower_id=follower_id,
-            following_id=following_id
-        ).first()
+        # DELETE ... RETURNING em um único comando
+        stmt = delete(Follow).where(
+            Follow.follower_id == follower_id,
+            Follow.following_id == following_id
+        ).returning(Follow.id)
+        
+        deleted = db.session.execute(stmt).first()
+        db.session.commit()
         
-        if not follow:
+        if deleted is None:
             return error_response('Você não está seguindo este usuário', 404)
         
-        db.session.delete(follow)
-        db.session.commit()
+        follow_cache.invalidate(follower_id)
+        follow_graph.remove(follower_id, following_id)
         
         return success_response(None, 'Usuário deixado de seguir com sucesso')
     
@@ -80,16 +175,61 @@ def unfollow_user(follower_id, following_id):
 def is_following(follower_id, following_id):
     """Verificar se está seguindo um usuário"""
     try:
-        follow = Follow.query.filter_by(
-            follower_id=follower_id,
-            following_id=following_id
-        ).first()
+        known, missing = follow_cache.lookup(follower_id, [following_id])
+        
+        if missing:
+            follow = Follow.query.filter_by(
+                follower_id=follower_id,
+                following_id=following_id
+            ).first()
+            known[following_id] = follow is not None
+            follow_cache.store(follower_id, known)
         
-        return success_response({'is_following': follow is not None})
+        return success_response({'is_following': known[following_id]})
     
     except Exception as e:
         return error_response(f'Erro ao verificar follow: {str(e)}', 500)
 
+@follows_bp.route('/is-following/batch', methods=['POST'])
+def is_following_batch():
+    """Verificar se está seguindo vários usuários de uma vez"""
+    try:
+        data = request.get_json()
+        
+        follower_id = data.get('followerId')
+        following_ids = data.get('followingIds')
+        
+        if not follower_id or not isinstance(following_ids, list):
+            return error_response('followerId e followingIds são obrigatórios', 400)
+        
+        # Remover duplicados mantendo a ordem
+        following_ids = list(dict.fromkeys(str(i) for i in following_ids))
+        
+        max_ids = current_app.config['FOLLOW_BATCH_MAX_IDS']
+        if len(following_ids) > max_ids:
+            return error_response(f'Máximo de {max_ids} ids por requisição', 400)
+        
+        known, missing = follow_cache.lookup(follower_id, following_ids)
+        
+        if missing:
+            # Uma única consulta IN para todos os ids fora do cache
+            rows = db.session.query(Follow.following_id).filter(
+                Follow.follower_id == follower_id,
+                Follow.following_id.in_(missing)
+            ).all()
+            found = {row.following_id for row in rows}
+            
+            fetched = {following_id: following_id in found for following_id in missing}
+            follow_cache.store(follower_id, fetched)
+            known.update(fetched)
+        
+        return success_response({
+            'is_following': {following_id: known[following_id] for following_id in following_ids}
+        })
+    
+    except Exception as e:
+        return error_response(f'Erro ao verificar follows: {str(e)}', 500)
+
 @follows_bp.route('/<user_id>/followers', methods=['GET'])
 def get_followers(user_id):
     """Listar seguidores de um usuário"""
@@ -165,3 +305,71 @@ def get_following(user_id):
     
     except Exception as e:
         return error_response(f'Erro ao listar seguindo: {str(e)}', 500)
+
+def _users_summary(user_ids):
+    """Obter dados resumidos de usuários com uma única consulta, na ordem dos ids"""
+    if not user_ids:
+        return {}
+    users = User.query.filter(User.id.in_(user_ids)).all()
+    return {
+        user.id: {
+            'id': user.id,
+            'user_id': user.user_id,
+            'name': user.name,
+            'avatar': user.avatar
+        }
+        for user in users
+    }
+
+@follows_bp.route('/<user_id>/mutual', methods=['GET'])
+def get_mutual(user_id):
+    """Listar follows mútuos (usuário segue e é seguido de volta)"""
+    try:
+        follow_graph.maybe_reload()  # também tenta de novo se a primeira carga falhou
+        if not follow_graph.ready:
+            return error_response('Índice de follows indisponível', 503)
+        
+        skip = int(request.args.get('skip', 0))
+        take = int(request.args.get('take', 20))
+        
+        mutual_ids = follow_graph.mutual(user_id)
+        page = mutual_ids[skip:skip + take]
+        users = _users_summary(page)
+        
+        return success_response({
+            'data': [users[i] for i in page if i in users],
+            'total': len(mutual_ids),
+            'skip': skip,
+            'take': take
+        })
+    
+    except Exception as e:
+        return error_response(f'Erro ao listar follows mútuos: {str(e)}', 500)
+
+@follows_bp.route('/<user_id>/suggestions', methods=['GET'])
+def get_suggestions(user_id):
+    """Sugerir usuários para seguir (amigos de amigos)"""
+    try:
+        follow_graph.maybe_reload()  # também tenta de novo se a primeira carga falhou
+        if not follow_graph.ready:
+            return error_response('Índice de follows indisponível', 503)
+        
+        take = min(int(request.args.get('take', 20)), 100)
+        
+        suggestions = follow_graph.suggestions(user_id, limit=take)
+        users = _users_summary([i for i, _ in suggestions])
+        
+        data = []
+        for suggested_id, mutual_count in suggestions:
+            if suggested_id in users:
+                data.append(dict(users[suggested_id], mutual_count=mutual_count))
+        
+        return success_response({'data': data, 'take': take})
+    
+    except Exception as e:
+        return error_response(f'Erro ao sugerir usuários: {str(e)}', 500)
+
+@follows_bp.route('/graph/stats', methods=['GET'])
+def get_graph_stats():
+    """Estatísticas e uso de memória do índice de follows"""
+    return success_response(follow_graph.stats())
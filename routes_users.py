@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify
-from models import db, User
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from sqlalchemy import select
+from models import db, User, Experience, Video, Follow, AccountDeletionJob
+from account_deletion import start_account_deletion
+from analytics import creator_analytics
 from utils import generate_tokens, verify_token, token_required, error_response, success_response
+from idempotency import idempotent
 from flask import current_app
+import json
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
@@ -172,6 +177,7 @@ def get_user(user_id):
 
 @users_bp.route('/me', methods=['PATCH'])
 @token_required
+@idempotent
 def update_me():
     """Atualizar dados do usuário autenticado"""
     try:
@@ -199,3 +205,143 @@ def update_me():
     except Exception as e:
         db.session.rollback()
         return error_response(f'Erro ao atualizar dados: {str(e)}', 500)
+
+@users_bp.route('/me', methods=['DELETE'])
+@token_required
+def delete_me():
+    """Excluir a conta do usuário autenticado (job em segundo plano)"""
+    try:
+        user = User.query.get(request.user_db_id)
+        
+        if not user:
+            return error_response('Usuário não encontrado', 404)
+        
+        job = start_account_deletion(user.id)
+        
+        return success_response(job.to_dict(), 'Exclusão de conta iniciada', 202)
+    
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'Erro ao excluir conta: {str(e)}', 500)
+
+@users_bp.route('/me/deletion', methods=['GET'])
+@token_required
+def get_deletion_status():
+    """Consultar o andamento da exclusão de conta"""
+    try:
+        job = AccountDeletionJob.query.filter_by(user_id=request.user_db_id).order_by(
+            AccountDeletionJob.created_at.desc()
+        ).first()
+        
+        if not job:
+            return error_response('Nenhuma exclusão de conta encontrada', 404)
+        
+        return success_response(job.to_dict())
+    
+    except Exception as e:
+        return error_response(f'Erro ao consultar exclusão: {str(e)}', 500)
+
+@users_bp.route('/<user_id>/analytics', methods=['GET'])
+@token_required
+def get_user_analytics(user_id):
+    """Analytics diários do criador (lidos apenas dos agregados de creator_daily_stats)"""
+    try:
+        if user_id != request.user_db_id:
+            return error_response('Você não tem permissão para ver estes dados', 403)
+        
+        days = request.args.get('days', 30, type=int)
+        max_days = current_app.config['ANALYTICS_MAX_DAYS']
+        if days < 1 or days > max_days:
+            return error_response(f'days deve estar entre 1 e {max_days}', 400)
+        
+        return success_response(creator_analytics(user_id, days))
+    
+    except Exception as e:
+        return error_response(f'Erro ao obter analytics: {str(e)}', 500)
+
+@users_bp.route('/<user_id>/export', methods=['GET'])
+@token_required
+def export_user(user_id):
+    """Exportar experiências, vídeos, seguidores e seguindo do usuário em NDJSON (streaming)"""
+    try:
+        user = User.query.get(user_id)
+        
+        if not user:
+            return error_response('Usuário não encontrado', 404)
+        
+        if user.id != request.user_db_id:
+            return error_response('Você não tem permissão para exportar estes dados', 403)
+        
+        user_data = user.to_dict()
+    
+    except Exception as e:
+        return error_response(f'Erro ao exportar dados: {str(e)}', 500)
+    
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    buffer_size = current_app.config['EXPORT_BUFFER_SIZE']
+    
+    def rows(stmt):
+        # yield_per usa cursor do lado do servidor no PostgreSQL
+        return db.session.execute(stmt.execution_options(yield_per=batch_size))
+    
+    def records():
+        yield 'user', user_data
+        
+        for experience in rows(select(Experience).where(Experience.creator_id == user_id)).scalars():
+            yield 'experience', experience.to_dict()
+            db.session.expunge(experience)
+        
+        for video in rows(select(Video).where(Video.creator_id == user_id)).scalars():
+            yield 'video', video.to_dict()
+            db.session.expunge(video)
+        
+        for record_type, own_column, other_column in (
+            ('follower', Follow.following_id, Follow.follower_id),
+            ('following', Follow.follower_id, Follow.following_id)
+        ):
+            stmt = select(
+                User.id, User.user_id, User.name, User.avatar, Follow.created_at
+            ).join(Follow, other_column == User.id).where(own_column == user_id)
+            
+            for row in rows(stmt):
+                yield record_type, {
+                    'id': row.id,
+                    'user_id': row.user_id,
+                    'name': row.name,
+                    'avatar': row.avatar,
+                    'followed_at': row.created_at.isoformat()
+                }
+    
+    def generate():
+        counts = {}
+        chunk = []
+        size = 0
+        
+        try:
+            for record_type, data in records():
+                counts[record_type] = counts.get(record_type, 0) + 1
+                line = json.dumps({'type': record_type, 'data': data}) + '\n'
+                chunk.append(line)
+                size += len(line)
+                
+                # Agrupar linhas para evitar uma escrita por registro
+                if size >= buffer_size:
+                    yield ''.join(chunk)
+                    chunk = []
+                    size = 0
+            
+            chunk.append(json.dumps({'type': 'end', 'counts': counts}) + '\n')
+        
+        except Exception as e:
+            chunk.append(json.dumps({'type': 'error', 'error': f'Erro ao exportar dados: {str(e)}'}) + '\n')
+        
+        finally:
+            db.session.rollback()
+        
+        yield ''.join(chunk)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="ripple-export-{user_id}.ndjson"'}
+    )
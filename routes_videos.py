@@ -1,6 +1,8 @@
 from flask import Blueprint, request
+from sqlalchemy import delete
 from models import db, Video
 from utils import token_required, error_response, success_response
+from idempotency import idempotent
 
 videos_bp = Blueprint('videos', __name__, url_prefix='/api/videos')
 
@@ -41,6 +43,7 @@ def get_videos_by_creator(creator_id):
 
 @videos_bp.route('', methods=['POST'])
 @token_required
+@idempotent
 def create_video():
     """Criar novo vídeo"""
     try:
@@ -77,6 +80,7 @@ def create_video():
 
 @videos_bp.route('/<video_id>', methods=['PATCH'])
 @token_required
+@idempotent
 def update_video(video_id):
     """Atualizar vídeo"""
     try:
@@ -109,6 +113,7 @@ def update_video(video_id):
         return error_response(f'Erro ao atualizar vídeo: {str(e)}', 500)
 
 @videos_bp.route('/<video_id>/views', methods=['PATCH'])
+@idempotent
 def update_video_views(video_id):
     """Incrementar visualizações"""
     try:
@@ -131,17 +136,19 @@ def update_video_views(video_id):
 def delete_video(video_id):
     """Deletar vídeo"""
     try:
-        video = Video.query.get(video_id)
+        stmt = delete(Video).where(
+            Video.id == video_id,
+            Video.creator_id == request.user_db_id
+        ).returning(Video.id)
         
-        if not video:
-            return error_response('Vídeo não encontrado', 404)
+        deleted = db.session.execute(stmt).first()
+        db.session.commit()
         
-        if video.creator_id != request.user_db_id:
+        if deleted is None:
+            if not db.session.get(Video, video_id):
+                return error_response('Vídeo não encontrado', 404)
             return error_response('Você não tem permissão para deletar este vídeo', 403)
         
-        db.session.delete(video)
-        db.session.commit()
-        
         return success_response(None, 'Vídeo deletado com sucesso')
     
     except Exception as e:
@@ -0,0 +1,262 @@
+import click
+import csv
+import hashlib
+import io
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+from models import db, User, Experience, Video, Follow
+
+CATEGORIES = ['music', 'sports', 'gaming', 'education', 'travel', 'food', 'art', 'tech']
+DEFAULT_PASSWORD = 'ripple-seed'
+
+class SyntheticData:
+    """Gerador de dados sintéticos em streaming
+
+    Os ids são derivados do índice de cada linha (hash determinístico), então
+    follows e vídeos referenciam usuários e experiências sem manter listas em
+    memória: o consumo fica constante independente do volume.
+    """
+
+    def __init__(self, users, experiences, videos, avg_following=20, skew=3.0, seed=42,
+                 password=DEFAULT_PASSWORD, days=365):
+        self.users = users
+        self.experiences = experiences
+        self.videos = videos
+        self.avg_following = avg_following
+        self.skew = skew
+        self.seed = seed
+        self.days = days
+        self.now = datetime.utcnow()
+
+        import bcrypt
+        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+    def _id(self, kind, i):
+        digest = hashlib.md5(f'{self.seed}:{kind}:{i}'.encode('utf-8')).digest()
+        return str(uuid.UUID(bytes=digest, version=4))
+
+    def user_id(self, i):
+        return self._id('user', i)
+
+    def experience_id(self, i):
+        return self._id('experience', i)
+
+    def video_id(self, i):
+        return self._id('video', i)
+
+    def _rng(self, kind):
+        return random.Random(f'{self.seed}:{kind}')
+
+    def _popular_user(self, rng):
+        """Sortear um usuário com viés para os primeiros índices (lei de potência)"""
+        return min(int(self.users * rng.random() ** self.skew), self.users - 1)
+
+    def _long_tail(self, rng, alpha, cap=10_000_000):
+        return min(int(rng.paretovariate(alpha)) - 1, cap)
+
+    def _created_at(self, rng):
+        return self.now - timedelta(seconds=rng.randint(0, self.days * 86400))
+
+    def user_rows(self):
+        rng = self._rng('users')
+        for i in range(self.users):
+            created_at = self._created_at(rng)
+            yield {
+                'id': self.user_id(i),
+                'user_id': f'seed{i}',
+                'name': f'Seed User {i}',
+                'email': f'seed{i}@example.com',
+                'phone': f'+5599{i:09d}',
+                'password': self.password_hash,
+                'avatar': None,
+                'bio': None,
+                'interests': rng.sample(CATEGORIES, rng.randint(0, 3)),
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+    def follow_rows(self):
+        if self.users < 2:
+            return
+        rng = self._rng('follows')
+        for follower in range(self.users):
+            # Quantidade de follows por usuário com cauda longa (média avg_following)
+            count = min(int(rng.expovariate(1.0 / self.avg_following)), self.users - 1) if self.avg_following else 0
+            targets = set()
+            attempts = 0
+            while len(targets) < count and attempts < count * 4:
+                attempts += 1
+                following = self._popular_user(rng)
+                if following != follower:
+                    targets.add(following)
+            follower_id = self.user_id(follower)
+            for following in targets:
+                yield {
+                    'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    'follower_id': follower_id,
+                    'following_id': self.user_id(following),
+                    'created_at': self._created_at(rng)
+                }
+
+    def experience_rows(self):
+        rng = self._rng('experiences')
+        for i in range(self.experiences):
+            creator = self._popular_user(rng)
+            created_at = self._created_at(rng)
+            yield {
+                'id': self.experience_id(i),
+                'title': f'Experience {i}',
+                'description': None,
+                'category': rng.choice(CATEGORIES),
+                'tags': rng.sample(CATEGORIES, rng.randint(0, 2)),
+                'duration': rng.randint(300, 7200),
+                'is_live': rng.random() < 0.05,
+                'participants': self._long_tail(rng, 1.5),
+                'engagement': self._long_tail(rng, 1.2),
+                'creator_id': self.user_id(creator),
+                'creator_name': f'Seed User {creator}',
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+    def video_rows(self):
+        rng = self._rng('videos')
+        for i in range(self.videos):
+            creator = self._popular_user(rng)
+            created_at = self._created_at(rng)
+            experience_id = None
+            if self.experiences and rng.random() < 0.6:
+                experience_id = self.experience_id(rng.randrange(self.experiences))
+            yield {
+                'id': self.video_id(i),
+                'title': f'Video {i}',
+                'description': None,
+                'url': f'https://cdn.example.com/seed/{i}.mp4',
+                'thumbnail': None,
+                'duration': rng.randint(5, 900),
+                'views': self._long_tail(rng, 1.1),
+                'creator_id': self.user_id(creator),
+                'creator_name': f'Seed User {creator}',
+                'experience_id': experience_id,
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _copy_chunk(raw_conn, table, chunk):
+    """COPY FROM STDIN (PostgreSQL) de um bloco de linhas"""
+    columns = list(chunk[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in chunk:
+        writer.writerow([_csv_value(row[c]) for c in columns])
+    buffer.seek(0)
+
+    sql = f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    cursor = raw_conn.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            cursor.copy_expert(sql, buffer)  # psycopg2
+        else:
+            with cursor.copy(sql) as copy:  # psycopg 3
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+def bulk_load(model, rows, chunk_size=10000, progress=None):
+    """Inserir linhas em blocos: COPY no PostgreSQL, executemany nos demais bancos"""
+    table = model.__table__
+    total = 0
+
+    if db.engine.dialect.name == 'postgresql':
+        raw_conn = db.engine.raw_connection()
+        try:
+            for chunk in _chunks(rows, chunk_size):
+                _copy_chunk(raw_conn, table, chunk)
+                raw_conn.commit()
+                total += len(chunk)
+                if progress:
+                    progress(table.name, total)
+        finally:
+            raw_conn.close()
+        return total
+
+    for chunk in _chunks(rows, chunk_size):
+        with db.engine.begin() as conn:
+            conn.execute(insert(table), chunk)
+        total += len(chunk)
+        if progress:
+            progress(table.name, total)
+    return total
+
+def load_synthetic(data, chunk_size=10000, progress=None):
+    """Carregar usuários, experiências, vídeos e follows; retorna linhas por tabela"""
+    counts = {}
+    counts['users'] = bulk_load(User, data.user_rows(), chunk_size, progress)
+    counts['experiences'] = bulk_load(Experience, data.experience_rows(), chunk_size, progress)
+    counts['videos'] = bulk_load(Video, data.video_rows(), chunk_size, progress)
+    counts['follows'] = bulk_load(Follow, data.follow_rows(), chunk_size, progress)
+    return counts
+
+@click.command('seed')
+@click.option('--users', type=int, default=10000, show_default=True)
+@click.option('--experiences', type=int, default=20000, show_default=True)
+@click.option('--videos', type=int, default=100000, show_default=True)
+@click.option('--avg-following', type=float, default=20, show_default=True, help='Média de follows por usuário')
+@click.option('--skew', type=float, default=3.0, show_default=True, help='Concentração em criadores populares')
+@click.option('--chunk-size', type=int, default=10000, show_default=True)
+@click.option('--seed', 'random_seed', type=int, default=42, show_default=True)
+@click.option('--password', default=DEFAULT_PASSWORD, show_default=True, help='Senha de todos os usuários')
+@with_appcontext
+def seed_command(users, experiences, videos, avg_following, skew, chunk_size, random_seed, password):
+    """Gerar e carregar dados sintéticos em massa"""
+    data = SyntheticData(
+        users=users,
+        experiences=experiences,
+        videos=videos,
+        avg_following=avg_following,
+        skew=skew,
+        seed=random_seed,
+        password=password
+    )
+
+    start = time.perf_counter()
+    last = {'at': 0.0}
+
+    def progress(table, total):
+        now = time.perf_counter()
+        if now - last['at'] >= 2:
+            last['at'] = now
+            click.echo(f'{table}: {total} linhas ({total / (now - start):.0f}/s)')
+
+    counts = load_synthetic(data, chunk_size, progress)
+
+    elapsed = time.perf_counter() - start
+    for table, total in counts.items():
+        click.echo(f'{table}: {total} linhas')
+    click.echo(f'Concluído em {elapsed:.1f}s')
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from analytics import rollup_creator_stats, creator_analytics
+
+@pytest.fixture
+def app():
+    return create_app('testing')
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def signup(client, user_id, phone):
+    response = client.post('/api/users/signup', json={
+        'name': user_id, 'userId': user_id, 'password': 'senha123',
+        'email': f'{user_id}@example.com', 'phone': phone
+    })
+    data = response.get_json()['data']
+    return data['id'], {'Authorization': f"Bearer {data['accessToken']}"}
+
+def totals(app, creator_id, today):
+    with app.app_context():
+        return creator_analytics(creator_id, 7, today)['totals']
+
+def test_rollup_zera_totais_quando_criador_perde_seguidor_e_video(app, client):
+    today = datetime.utcnow().date()
+    a, headers_a = signup(client, 'ana', '+5511900000001')
+    b, headers_b = signup(client, 'bia', '+5511900000002')
+
+    client.post('/api/follows', json={'followerId': a, 'followingId': b}, headers=headers_a)
+    video = client.post('/api/videos', json={'title': 'Vídeo', 'url': 'https://x/v.mp4', 'duration': 10},
+                        headers=headers_b).get_json()['data']
+    for _ in range(5):
+        client.patch(f"/api/videos/{video['id']}/views")
+
+    with app.app_context():
+        rollup_creator_stats(today)
+    assert totals(app, b, today)['followers_total'] == 1
+    assert totals(app, b, today)['views_total'] == 5
+
+    client.delete(f'/api/follows/{a}/{b}', headers=headers_a)
+    client.delete(f"/api/videos/{video['id']}", headers=headers_b)
+
+    tomorrow = today + timedelta(days=1)
+    with app.app_context():
+        rollup_creator_stats(tomorrow)
+    result = totals(app, b, tomorrow)
+    assert result['followers_total'] == 0
+    assert result['views_total'] == 0
+    assert result['new_followers'] == 0
+
+def test_rollup_no_mesmo_dia_zera_totais_registrados_hoje(app, client):
+    today = datetime.utcnow().date()
+    a, headers_a = signup(client, 'ana', '+5511900000001')
+    b, _ = signup(client, 'bia', '+5511900000002')
+
+    client.post('/api/follows', json={'followerId': a, 'followingId': b}, headers=headers_a)
+    with app.app_context():
+        rollup_creator_stats(today)
+    assert totals(app, b, today)['followers_total'] == 1
+
+    client.delete(f'/api/follows/{a}/{b}', headers=headers_a)
+    with app.app_context():
+        rollup_creator_stats(today)
+    result = totals(app, b, today)
+    assert result['followers_total'] == 0
+    assert result['new_followers'] == 0
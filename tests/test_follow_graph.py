@@ -0,0 +1,59 @@
+import time
+from datetime import datetime
+import pytest
+from app import create_app
+from follow_graph import follow_graph
+from models import db, Follow
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    follow_graph.refresh_interval = 30
+    return app
+
+def signup(client, user_id, phone):
+    response = client.post('/api/users/signup', json={
+        'name': user_id, 'userId': user_id, 'password': 'senha123',
+        'email': f'{user_id}@example.com', 'phone': phone
+    })
+    return response.get_json()['data']['id']
+
+def wait_reload():
+    deadline = time.monotonic() + 5
+    while follow_graph._reloading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_refresh_incremental_le_follows_de_outros_workers(app):
+    client = app.test_client()
+    a = signup(client, 'ana', '+5511900000001')
+    b = signup(client, 'bia', '+5511900000002')
+
+    # Follows gravados por outro processo não passam por follow_graph.add
+    with app.app_context():
+        db.session.add_all([
+            Follow(follower_id=a, following_id=b, created_at=datetime.utcnow()),
+            Follow(follower_id=b, following_id=a, created_at=datetime.utcnow()),
+        ])
+        db.session.commit()
+        assert follow_graph.mutual(a) == []
+
+        loaded_at = follow_graph.loaded_at
+        follow_graph.refreshed_at -= follow_graph.refresh_interval
+        follow_graph.maybe_reload()
+        wait_reload()
+
+    assert follow_graph.mutual(a) == [b]
+    assert follow_graph.loaded_at == loaded_at  # sem carga completa
+
+def test_primeira_carga_com_falha_e_tentada_de_novo(app):
+    # Estado de um worker que iniciou antes das migrações
+    follow_graph.loaded_at = None
+    follow_graph._attempted_at = 0.0
+    client = app.test_client()
+
+    client.get('/api/follows/qualquer/mutual')
+    wait_reload()
+    assert follow_graph.ready
+
+    response = client.get('/api/follows/qualquer/mutual')
+    assert response.status_code == 200
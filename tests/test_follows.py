@@ -0,0 +1,44 @@
+import pytest
+from app import create_app
+from models import db, User
+
+@pytest.fixture
+def client():
+    return create_app('testing').test_client()
+
+def signup(client, user_id, phone):
+    data = client.post('/api/users/signup', json={
+        'name': user_id, 'userId': user_id, 'password': 'senha123',
+        'email': f'{user_id}@example.com', 'phone': phone
+    }).get_json()['data']
+    return data['id'], {'Authorization': f"Bearer {data['accessToken']}"}
+
+def test_follow_usa_o_usuario_do_token(client):
+    a, headers_a = signup(client, 'ana', '+5511900000001')
+    b, _ = signup(client, 'bia', '+5511900000002')
+    c, _ = signup(client, 'caio', '+5511900000003')
+
+    response = client.post('/api/follows', json={'followerId': b, 'followingId': c}, headers=headers_a)
+    assert response.status_code == 403
+
+    response = client.post('/api/follows', json={'followingId': c}, headers=headers_a)
+    assert response.status_code == 201
+    assert response.get_json()['data']['follower_id'] == a
+
+def test_unfollow_em_nome_de_outro_usuario_e_proibido(client):
+    a, headers_a = signup(client, 'ana', '+5511900000001')
+    b, headers_b = signup(client, 'bia', '+5511900000002')
+    client.post('/api/follows', json={'followingId': a}, headers=headers_b)
+
+    assert client.delete(f'/api/follows/{b}/{a}', headers=headers_a).status_code == 403
+    assert client.delete(f'/api/follows/{b}/{a}', headers=headers_b).status_code == 200
+
+def test_seguidor_inexistente_responde_404(client):
+    a, headers_a = signup(client, 'ana', '+5511900000001')
+    b, _ = signup(client, 'bia', '+5511900000002')
+    with client.application.app_context():
+        db.session.delete(db.session.get(User, a))
+        db.session.commit()
+
+    assert client.post('/api/follows', json={'followingId': b}, headers=headers_a).status_code == 404
+    assert client.post('/api/follows/batch', json={'followingIds': [b]}, headers=headers_a).status_code == 404
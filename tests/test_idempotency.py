@@ -0,0 +1,24 @@
+import pytest
+from app import create_app
+
+@pytest.fixture
+def client():
+    return create_app('testing').test_client()
+
+def test_query_string_diferente_com_a_mesma_chave_responde_422(client):
+    data = client.post('/api/users/signup', json={
+        'name': 'ana', 'userId': 'ana', 'password': 'senha123',
+        'email': 'ana@example.com', 'phone': '+5511900000001'
+    }).get_json()['data']
+    headers = {'Authorization': f"Bearer {data['accessToken']}"}
+    video = client.post('/api/videos', json={'title': 'Vídeo', 'url': 'https://x/v.mp4', 'duration': 10},
+                        headers=headers).get_json()['data']
+
+    url = f"/api/videos/{video['id']}"
+    first = client.patch(f'{url}?notify=1', json={'title': 'Novo'}, headers=dict(headers, **{'Idempotency-Key': 'k1'}))
+    replay = client.patch(f'{url}?notify=1', json={'title': 'Novo'}, headers=dict(headers, **{'Idempotency-Key': 'k1'}))
+    other = client.patch(f'{url}?notify=0', json={'title': 'Novo'}, headers=dict(headers, **{'Idempotency-Key': 'k1'}))
+
+    assert first.status_code == 200
+    assert replay.headers.get('Idempotent-Replayed') == 'true'
+    assert other.status_code == 422
@@ -0,0 +1,321 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from flask import request, g
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+_current = ContextVar('ripple_trace', default=None)
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, trace, name, parent_id, kind=1, attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.time_ns()) - self.start) / 1e6
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or self.start),
+            'attributes': [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class Trace:
+    """Spans de uma requisição; a pilha indica o span pai dos próximos
+
+    Guarda no máximo max_spans spans (o primeiro é o raiz). Acima disso os
+    spans só entram nos totais por fase, para que rotas longas (ex.: exportação
+    em streaming) não acumulem memória por linha.
+    """
+
+    __slots__ = ('trace_id', 'sampled', 'spans', 'stack', 'max_spans', 'totals', 'dropped')
+
+    def __init__(self, trace_id=None, sampled=False, max_spans=1000):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans = []
+        self.stack = []
+        self.max_spans = max_spans
+        self.totals = {}
+        self.dropped = 0
+
+    def start_span(self, name, kind=1, attributes=None, parent_id=None):
+        parent = parent_id or (self.stack[-1].span_id if self.stack else None)
+        span = Span(self, name, parent, kind, attributes)
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        self.stack.append(span)
+        return span
+
+    def end_span(self, span, error=None):
+        span.end = time.time_ns()
+        if error is not None:
+            span.error = str(error).splitlines()[0] if str(error) else type(error).__name__
+        if span in self.stack:
+            self.stack.remove(span)
+        if self.spans and span is not self.spans[0]:
+            phase = span.name.split(' ')[0]
+            count, ms = self.totals.get(phase, (0, 0.0))
+            self.totals[phase] = (count + 1, ms + span.duration_ms)
+
+class _SpanContext:
+    __slots__ = ('name', 'attributes', 'span')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self):
+        trace = _current.get()
+        if trace is not None:
+            self.span = trace.start_span(self.name, attributes=self.attributes)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.trace.end_span(self.span, exc)
+        return False
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+def _parse_traceparent(header):
+    """W3C traceparent '00-<trace id>-<span pai>-<flags>' -> (trace id, span pai, amostrado)"""
+    parts = header.split('-') if header else []
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None, False
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None, None, False
+    return parts[1], parts[2], sampled
+
+def span(name, **attributes):
+    """Context manager que registra um span se houver trace ativo (senão não faz nada)"""
+    return _SpanContext(name, attributes)
+
+def traced(name):
+    """Decorator: registrar cada chamada da função como um span"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return f(*args, **kwargs)
+            with _SpanContext(name, {'code.function': f.__qualname__}):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """Provider JSON do Flask que registra a serialização de jsonify como span"""
+
+    def response(self, *args, **kwargs):
+        with _SpanContext('jsonify', {}):
+            return super().response(*args, **kwargs)
+
+class Tracer:
+    """Tracing em processo das requisições, exportado em OTLP/JSON
+
+    Cada requisição vira um trace com spans para o decode do JWT, comandos SQL
+    (com o texto do statement), lazy loads de relacionamentos, to_dict e
+    jsonify, guardando até TRACING_MAX_SPANS spans (os demais só entram nos
+    totais por fase). Os spans são sempre coletados; o trace é exportado se a
+    requisição foi sorteada (TRACING_SAMPLE_RATE), se veio com traceparent
+    amostrado ou se passou de TRACING_SLOW_MS. A exportação é uma linha
+    OTLP/JSON por trace em TRACING_FILE, escrita por uma thread de fundo
+    (formato lido pelo receiver otlpjsonfile do OpenTelemetry Collector).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.slow_ms = 500
+        self.path = None
+        self.service_name = 'ripple-backend'
+        self.max_statement_length = 2048
+        self.max_spans = 1000
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('TRACING_ENABLED', False)
+        self.sample_rate = app.config.get('TRACING_SAMPLE_RATE', 0.0)
+        self.slow_ms = app.config.get('TRACING_SLOW_MS', 500)
+        self.path = app.config.get('TRACING_FILE', 'traces.jsonl')
+        self.service_name = app.config.get('TRACING_SERVICE_NAME', 'ripple-backend')
+        self.max_statement_length = app.config.get('TRACING_MAX_STATEMENT_LENGTH', 2048)
+        self.max_spans = app.config.get('TRACING_MAX_SPANS', 1000)
+
+        if not self.enabled:
+            return
+
+        app.json = TracedJSONProvider(app)
+        app.before_request(self.start_request)
+        app.after_request(self.add_header)
+        app.teardown_request(self.end_request)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+            event.listen(Session, 'do_orm_execute', _do_orm_execute)
+
+    def start_request(self):
+        trace_id, parent_id, sampled = _parse_traceparent(request.headers.get('traceparent'))
+        trace = Trace(trace_id, sampled or random.random() < self.sample_rate, self.max_spans)
+        root = trace.start_span(f'{request.method} {request.url_rule or request.path}', kind=2, parent_id=parent_id, attributes={
+            'http.request.method': request.method,
+            'url.path': request.path,
+            'http.route': str(request.url_rule) if request.url_rule else None,
+            'flask.endpoint': request.endpoint,
+        })
+        _current.set(trace)
+        g.trace_root = root
+
+    def add_header(self, response):
+        root = g.get('trace_root')
+        if root is not None:
+            root.attributes['http.response.status_code'] = response.status_code
+            response.headers['traceparent'] = f'00-{root.trace.trace_id}-{root.span_id}-{"01" if root.trace.sampled else "00"}'
+        return response
+
+    def end_request(self, exc=None):
+        root = g.pop('trace_root', None)
+        if root is None:
+            return
+
+        trace = root.trace
+        trace.end_span(root, exc)
+        _current.set(None)
+
+        if trace.sampled or root.duration_ms >= self.slow_ms:
+            root.attributes.update(self._breakdown(trace))
+            self._export(trace)
+
+    def _breakdown(self, trace):
+        """Tempo total e quantidade por fase, como atributos do span raiz"""
+        attributes = {}
+        for phase, (count, ms) in trace.totals.items():
+            attributes[f'ripple.{phase}.count'] = count
+            attributes[f'ripple.{phase}.ms'] = round(ms, 3)
+        if trace.dropped:
+            attributes['ripple.spans.dropped'] = trace.dropped
+        return attributes
+
+    def _export(self, trace):
+        line = json.dumps({
+            'resourceSpans': [{
+                'resource': {'attributes': [_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': 'ripple.tracing'},
+                    'spans': [s.to_otlp() for s in trace.spans]
+                }]
+            }]
+        }, separators=(',', ':'))
+        self._queue.put(line)
+
+        # Thread criada sob demanda (e recriada nos workers após o fork)
+        if self._writer is None or not self._writer.is_alive():
+            with self._lock:
+                if self._writer is None or not self._writer.is_alive():
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            lines = [self._queue.get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    def flush(self, timeout=5):
+        """Esperar a escrita dos traces pendentes (testes e benchmarks)"""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    if trace is None or context is None:
+        return
+    context._trace_span = trace.start_span(f'db.query {statement.split(None, 1)[0].upper()}', kind=3, attributes={
+        'db.system': conn.dialect.name,
+        'db.statement': statement[:tracer.max_statement_length],
+        'db.executemany': executemany,
+    })
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, '_trace_span', None)
+    if span is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.attributes['db.rowcount'] = cursor.rowcount
+        span.trace.end_span(span)
+        context._trace_span = None
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, '_trace_span', None)
+    if span is not None:
+        span.trace.end_span(span, exception_context.original_exception)
+        exception_context.execution_context._trace_span = None
+
+def _do_orm_execute(orm_execute_state):
+    """Envolver lazy loads de relacionamentos em um span com o SQL como filho"""
+    # lazy_loaded_from só existe em SELECT (levanta InvalidRequestError em INSERT/UPDATE/DELETE)
+    if _current.get() is None or not orm_execute_state.is_select:
+        return None
+    if orm_execute_state.lazy_loaded_from is None:
+        return None
+    parent = orm_execute_state.lazy_loaded_from
+    entity = orm_execute_state.bind_arguments.get('mapper')
+    with _SpanContext('orm.lazy_load', {
+        'orm.parent': parent.class_.__name__,
+        'orm.entity': entity.class_.__name__ if entity is not None else None,
+    }):
+        return orm_execute_state.invoke_statement()
+
+tracer = Tracer()
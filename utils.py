@@ -2,6 +2,8 @@ import jwt
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, current_app
+from rate_limit import rate_limiter
+from tracing import span
 
 def generate_tokens(user_id, user_db_id):
     """Gerar access token e refresh token"""
@@ -63,7 +65,8 @@ def token_required(f):
             return jsonify({'error': 'Token não fornecido'}), 401
         
         # Verificar token
-        payload = verify_token(token, current_app.config['JWT_SECRET'])
+        with span('jwt.decode'):
+            payload = verify_token(token, current_app.config['JWT_SECRET'])
         if not payload:
             return jsonify({'error': 'Token inválido ou expirado'}), 401
         
@@ -71,6 +74,11 @@ def token_required(f):
         request.user_id = payload.get('user_id')
         request.user_db_id = payload.get('id')
         
+        # Limite por usuário autenticado
+        limited = rate_limiter.check_user(request.user_db_id)
+        if limited:
+            return limited
+        
         return f(*args, **kwargs)
     
     return decorated
@@ -0,0 +1,6 @@
+import os
+from app import create_app
+
+# Ponto de entrada WSGI: com `preload_app` o gunicorn cria a aplicação uma vez
+# no processo mestre e os workers herdam o estado aquecido via fork
+app = create_app(os.getenv('FLASK_ENV', 'production'))